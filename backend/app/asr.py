@@ -1,25 +1,37 @@
 import os
 import threading
-from typing import TYPE_CHECKING, Iterable, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Tuple
 
+from .runtime_config import get_runtime_config
 from .settings import settings
 
 if TYPE_CHECKING:
     from faster_whisper import WhisperModel
 
 
+def _vad_parameters() -> Dict[str, Any]:
+    return {
+        "min_silence_duration_ms": max(
+            0, int(settings.asr_vad_min_silence_ms)
+        ),
+    }
+
+
 class ASR:
     def __init__(self) -> None:
         self._model: Optional["WhisperModel"] = None
+        self._batched: Optional[Any] = None
+        self._warmed = False
         self._loaded_model_name: Optional[str] = None
         self._loaded_device: Optional[str] = None
         self._loaded_compute_type: Optional[str] = None
         self._lock = threading.Lock()
 
     def _ensure_loaded(self) -> None:
-        model_name = os.getenv("ASR_MODEL", settings.asr_model)
-        device = os.getenv("ASR_DEVICE", settings.asr_device)
-        compute_type = os.getenv("ASR_COMPUTE_TYPE", settings.asr_compute_type)
+        cfg = get_runtime_config()
+        model_name = cfg.asr_model
+        device = cfg.asr_device
+        compute_type = cfg.asr_compute_type
 
         with self._lock:
             if self._model is not None:
@@ -32,6 +44,8 @@ class ASR:
                     return
 
                 self._model = None
+                self._batched = None
+                self._warmed = False
                 self._loaded_model_name = None
                 self._loaded_device = None
                 self._loaded_compute_type = None
@@ -46,19 +60,56 @@ class ASR:
                 device=str(device or "cpu"),
                 compute_type=str(compute_type or "int8"),
             )
+            self._batched = None
+            if int(settings.asr_batch_size) > 1:
+                try:
+                    from faster_whisper import BatchedInferencePipeline
+
+                    self._batched = BatchedInferencePipeline(
+                        model=self._model
+                    )
+                except ImportError:
+                    self._batched = None
             self._loaded_model_name = str(model_name or "")
             self._loaded_device = str(device or "")
             self._loaded_compute_type = str(compute_type or "")
 
+    def warmup(self) -> None:
+        self._ensure_loaded()
+        if self._warmed:
+            return
+        import numpy as np
+
+        assert self._model is not None
+        segments, _ = self._model.transcribe(
+            np.zeros(8000, dtype=np.float32),
+            language=settings.asr_language,
+            beam_size=1,
+        )
+        for _ in segments:
+            pass
+        self._warmed = True
+
     def transcribe_wav(
         self,
         wav_path: str,
     ) -> Tuple[Iterable, object]:
         self._ensure_loaded()
         assert self._model is not None
+        if self._batched is not None:
+            return self._batched.transcribe(
+                wav_path,
+                language=settings.asr_language,
+                beam_size=1,
+                vad_filter=True,
+                vad_parameters=_vad_parameters(),
+                batch_size=int(settings.asr_batch_size),
+                without_timestamps=False,
+            )
         return self._model.transcribe(
             wav_path,
             language=settings.asr_language,
             beam_size=1,
             vad_filter=True,
+            vad_parameters=_vad_parameters(),
         )
@@ -1,6 +1,6 @@
 import hashlib
 import json
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 def sha256_json(obj: Any) -> str:
@@ -31,16 +31,9 @@ def _is_natural_boundary(text: str) -> bool:
     )
 
 
-def segments_to_time_chunks(
-    segments: List[Dict[str, Any]],
-    *,
-    target_window_seconds: float,
-    max_window_seconds: float,
-    min_window_seconds: float,
-    overlap_seconds: float,
-    silence_gap_seconds: float = 0.8,
-) -> List[Dict[str, Any]]:
-    segs: List[Tuple[float, float, str]] = []
+def _iter_clean_segments(
+    segments: Iterable[Dict[str, Any]],
+) -> Iterator[Tuple[float, float, str, bool]]:
     for seg in segments:
         start_v = seg.get("start")
         end_v = seg.get("end")
@@ -56,29 +49,46 @@ def segments_to_time_chunks(
         text = (seg.get("text") or "").strip()
         if not text:
             continue
-        segs.append((s, e, text))
+        yield (s, e, text, _is_natural_boundary(text))
 
-    if not segs:
-        return []
 
-    chunks: List[Dict[str, Any]] = []
-    i = 0
-    n = len(segs)
+def iter_time_chunks(
+    segments: Iterable[Dict[str, Any]],
+    *,
+    target_window_seconds: float,
+    max_window_seconds: float,
+    min_window_seconds: float,
+    overlap_seconds: float,
+    silence_gap_seconds: float = 0.8,
+) -> Iterator[Dict[str, Any]]:
+    src = _iter_clean_segments(segments)
+    segs: List[Tuple[float, float, str, bool]] = []
+    exhausted = False
+
+    def _has(idx: int) -> bool:
+        nonlocal exhausted
+        while len(segs) <= idx and not exhausted:
+            nxt = next(src, None)
+            if nxt is None:
+                exhausted = True
+            else:
+                segs.append(nxt)
+        return idx < len(segs)
 
-    while i < n:
+    i = 0
+    while _has(i):
         start_time = segs[i][0]
         end_time = segs[i][1]
-        texts = [segs[i][2]]
         last_boundary_j: Optional[int] = None
 
         j = i
         while True:
             cur_len = end_time - start_time
             if cur_len >= target_window_seconds:
-                if _is_natural_boundary(texts[-1]):
+                if segs[j][3]:
                     last_boundary_j = j
 
-                if j + 1 < n:
+                if _has(j + 1):
                     gap = segs[j + 1][0] - segs[j][1]
                     if gap >= silence_gap_seconds:
                         last_boundary_j = j
@@ -89,29 +99,24 @@ def segments_to_time_chunks(
                 ):
                     j = last_boundary_j
                     end_time = segs[j][1]
-                    texts = [t for _, _, t in segs[i:j + 1]]
                     break
 
             if cur_len >= max_window_seconds:
                 break
 
-            if j + 1 >= n:
+            if not _has(j + 1):
                 break
 
             j += 1
             end_time = segs[j][1]
-            texts.append(segs[j][2])
-
-        chunk_text = " ".join(texts).strip()
-        chunks.append(
-            {
-                "start_time": float(start_time),
-                "end_time": float(end_time),
-                "text": chunk_text,
-            }
-        )
 
-        if j + 1 >= n:
+        yield {
+            "start_time": float(start_time),
+            "end_time": float(end_time),
+            "text": " ".join(seg[2] for seg in segs[i:j + 1]).strip(),
+        }
+
+        if not _has(j + 1):
             break
 
         next_start_threshold = float(end_time) - float(overlap_seconds)
@@ -119,6 +124,26 @@ def segments_to_time_chunks(
         while k > i and segs[k - 1][1] > next_start_threshold:
             k -= 1
 
-        i = max(k, i + 1)
+        del segs[:max(k, i + 1)]
+        i = 0
+
 
-    return chunks
+def segments_to_time_chunks(
+    segments: Iterable[Dict[str, Any]],
+    *,
+    target_window_seconds: float,
+    max_window_seconds: float,
+    min_window_seconds: float,
+    overlap_seconds: float,
+    silence_gap_seconds: float = 0.8,
+) -> List[Dict[str, Any]]:
+    return list(
+        iter_time_chunks(
+            segments,
+            target_window_seconds=target_window_seconds,
+            max_window_seconds=max_window_seconds,
+            min_window_seconds=min_window_seconds,
+            overlap_seconds=overlap_seconds,
+            silence_gap_seconds=silence_gap_seconds,
+        )
+    )
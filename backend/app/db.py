@@ -1,10 +1,26 @@
+import os
 import sqlite3
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Any, Iterator
 
 from .paths import db_path, ensure_dirs
 
 
+def _load_driver() -> Any:
+    name = str(os.getenv("EDGE_VIDEO_AGENT_SQLITE_DRIVER", "") or "")
+    if name.strip().lower() == "sqlite3":
+        return sqlite3
+    try:
+        from pysqlite3 import dbapi2  # type: ignore
+
+        return dbapi2
+    except Exception:
+        return sqlite3
+
+
+_driver = _load_driver()
+
+
 def _has_column(conn: sqlite3.Connection, table: str, col: str) -> bool:
     rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
     return any(r["name"] == col for r in rows)
@@ -16,6 +32,8 @@ def _migrate(conn: sqlite3.Connection) -> None:
         conn.execute(
             "UPDATE jobs SET updated_at=created_at WHERE updated_at IS NULL"
         )
+    if not _has_column(conn, "video_indexes", "collection_name"):
+        conn.execute("ALTER TABLE video_indexes ADD COLUMN collection_name TEXT")
 
 
 def init_db() -> None:
@@ -70,6 +88,7 @@ def init_db() -> None:
                 message TEXT DEFAULT '',
                 embed_model TEXT,
                 embed_dim INTEGER,
+                collection_name TEXT,
                 chunk_params_json TEXT,
                 transcript_hash TEXT,
                 chunk_count INTEGER DEFAULT 0,
@@ -156,6 +175,25 @@ def init_db() -> None:
             CREATE INDEX IF NOT EXISTS idx_chunks_time
                 ON chunks(video_id, start_time);
 
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                embed_model TEXT NOT NULL,
+                embed_dim INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                created_at TEXT DEFAULT (datetime('now')),
+                PRIMARY KEY (embed_model, embed_dim, content_hash)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                cache_key TEXT PRIMARY KEY,
+                transcript_hash TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at TEXT DEFAULT (datetime('now'))
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_llm_response_cache_transcript
+                ON llm_response_cache(transcript_hash);
+
             CREATE TABLE IF NOT EXISTS llm_preferences (
                 id INTEGER PRIMARY KEY CHECK (id = 1),
                 prefs_json TEXT NOT NULL,
@@ -188,8 +226,13 @@ def init_db() -> None:
 @contextmanager
 def connect() -> Iterator[sqlite3.Connection]:
     ensure_dirs()
-    conn = sqlite3.connect(db_path(), timeout=30, isolation_level=None)
-    conn.row_factory = sqlite3.Row
+    conn = _driver.connect(
+        db_path(),
+        timeout=30,
+        isolation_level=None,
+        cached_statements=512,
+    )
+    conn.row_factory = _driver.Row
     try:
         conn.execute("PRAGMA foreign_keys=ON")
         yield conn
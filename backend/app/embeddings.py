@@ -1,4 +1,5 @@
 import hashlib
+import threading
 from typing import Any, Dict, List
 
 
@@ -12,6 +13,25 @@ def _hash_embedding(text: str, dim: int) -> List[float]:
     return out
 
 
+def _hash_embeddings(texts: List[str], dim: int) -> List[List[float]]:
+    if not texts:
+        return []
+    try:
+        import numpy as np
+    except Exception:
+        return [_hash_embedding(t, dim=dim) for t in texts]
+
+    n = hashlib.sha256().digest_size
+    digests = np.frombuffer(
+        b"".join(
+            hashlib.sha256((t or "").encode("utf-8")).digest() for t in texts
+        ),
+        dtype=np.uint8,
+    ).reshape(len(texts), n)
+    cols = np.arange(int(dim)) % n
+    return ((digests[:, cols] - 128.0) / 128.0).tolist()
+
+
 def embed_texts(
     texts: List[str],
     *,
@@ -25,7 +45,7 @@ def embed_texts(
         raise ValueError("EMBEDDING_DIM_INVALID")
 
     if model_norm == "hash":
-        return [_hash_embedding(t, dim=dim_i) for t in texts]
+        return _hash_embeddings(texts, dim=dim_i)
 
     if model_norm.startswith("fastembed"):
         model_name = ""
@@ -44,6 +64,7 @@ def embed_texts(
 
 
 _fastembed_models: Dict[str, Any] = {}
+_fastembed_models_lock = threading.Lock()
 
 
 def _normalize_dim(vec: List[float], dim: int) -> List[float]:
@@ -74,8 +95,11 @@ def _embed_texts_fastembed(
 
     emb = _fastembed_models.get(key)
     if emb is None:
-        emb = TextEmbedding(model_name=key)
-        _fastembed_models[key] = emb
+        with _fastembed_models_lock:
+            emb = _fastembed_models.get(key)
+            if emb is None:
+                emb = TextEmbedding(model_name=key)
+                _fastembed_models[key] = emb
 
     out: List[List[float]] = []
     for v in emb.embed(texts):
@@ -1,14 +1,30 @@
+import csv
 import os
 import re
 import shutil
+import signal
 import subprocess
-from typing import List, Optional
+import threading
+import time
+from typing import Dict, Generator, Iterator, List, Optional, Tuple
 
 
 _DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
 
 _PTS_TIME_RE = re.compile(r"pts_time:(\d+(?:\.\d+)?)")
 _SCENE_SCORE_RE = re.compile(r"lavfi\.scene_score=(\d+(?:\.\d+)?)")
+_SHOWINFO_SIZE_RE = re.compile(
+    r"\[[^\]]*\bkf(\d+)[^\]]*\][^\n]*\bs:(\d+)x(\d+)"
+)
+
+FrameSize = Optional[Tuple[int, int]]
+
+
+def _parse_showinfo_sizes(text: str) -> Dict[int, Tuple[int, int]]:
+    out: Dict[int, Tuple[int, int]] = {}
+    for m in _SHOWINFO_SIZE_RE.finditer(text):
+        out.setdefault(int(m.group(1)), (int(m.group(2)), int(m.group(3))))
+    return out
 
 
 def resolve_ffmpeg_bin() -> str:
@@ -106,6 +122,158 @@ def extract_audio_wav(
     run(cmd)
 
 
+def _throttle_segments(
+    proc: subprocess.Popen,
+    out_dir: str,
+    max_pending: int,
+    poll_seconds: float,
+    done: threading.Event,
+) -> None:
+    paused = False
+    try:
+        while not done.wait(poll_seconds):
+            try:
+                n = sum(1 for name in os.listdir(out_dir) if name.endswith(".wav"))
+            except OSError:
+                continue
+            if not paused and n > max_pending:
+                proc.send_signal(signal.SIGSTOP)
+                paused = True
+            elif paused and n <= max_pending:
+                proc.send_signal(signal.SIGCONT)
+                paused = False
+    except OSError:
+        pass
+    finally:
+        if paused and proc.poll() is None:
+            try:
+                proc.send_signal(signal.SIGCONT)
+            except OSError:
+                pass
+
+
+def iter_audio_segments(
+    media_path: str,
+    out_dir: str,
+    *,
+    segment_seconds: float,
+    start_seconds: float = 0.0,
+    poll_seconds: float = 0.1,
+    max_pending: int = 0,
+) -> Generator[Tuple[str, float, float], None, None]:
+    ffmpeg = resolve_ffmpeg_bin()
+    os.makedirs(out_dir, exist_ok=True)
+    list_path = os.path.join(out_dir, "segments.csv")
+    log_path = os.path.join(out_dir, "ffmpeg.log")
+    cmd: List[str] = [ffmpeg, "-y", "-loglevel", "error"]
+    if start_seconds and start_seconds > 0:
+        cmd += ["-ss", str(start_seconds)]
+    cmd += [
+        "-i",
+        media_path,
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        "16000",
+        "-f",
+        "segment",
+        "-segment_time",
+        str(float(segment_seconds)),
+        "-segment_format",
+        "wav",
+        "-reset_timestamps",
+        "1",
+        "-segment_list",
+        list_path,
+        "-segment_list_type",
+        "csv",
+        os.path.join(out_dir, "chunk_%05d.wav"),
+    ]
+
+    def _rows(lines: List[bytes]) -> Iterator[Tuple[str, float, float]]:
+        text = (b.decode("utf-8") for b in lines if b.strip())
+        for row in csv.reader(text):
+            if len(row) < 3:
+                continue
+            yield (
+                os.path.join(out_dir, os.path.basename(row[0])),
+                float(row[1]),
+                float(row[2]),
+            )
+
+    with open(log_path, "wb") as log:
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+        )
+        done = threading.Event()
+        throttle: Optional[threading.Thread] = None
+        if max_pending > 0 and hasattr(signal, "SIGSTOP"):
+            throttle = threading.Thread(
+                target=_throttle_segments,
+                args=(proc, out_dir, max_pending, poll_seconds, done),
+                daemon=True,
+            )
+            throttle.start()
+        try:
+            pos = 0
+            buf = b""
+            while True:
+                exited = proc.poll() is not None
+                try:
+                    with open(list_path, "rb") as f:
+                        f.seek(pos)
+                        data = f.read()
+                except FileNotFoundError:
+                    data = b""
+                pos += len(data)
+                lines = (buf + data).split(b"\n")
+                buf = lines.pop()
+                yield from _rows(lines)
+                if exited:
+                    break
+                time.sleep(poll_seconds)
+            yield from _rows([buf])
+        finally:
+            done.set()
+            if throttle is not None:
+                throttle.join()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+    if proc.returncode != 0:
+        with open(
+            log_path, "r", encoding="utf-8", errors="replace"
+        ) as log_f:
+            detail = log_f.read().strip()
+        raise RuntimeError(
+            "Command failed:\n"
+            f"  cmd: {' '.join(cmd)}\n"
+            f"  detail: {detail[:2000]}"
+        )
+
+
+def extract_audio_segments(
+    media_path: str,
+    out_dir: str,
+    *,
+    segment_seconds: float,
+    start_seconds: float = 0.0,
+) -> List[Tuple[str, float, float]]:
+    return list(
+        iter_audio_segments(
+            media_path,
+            out_dir,
+            segment_seconds=segment_seconds,
+            start_seconds=start_seconds,
+        )
+    )
+
+
 def extract_video_frame_jpg(
     media_path: str,
     jpg_path: str,
@@ -133,6 +301,36 @@ def extract_video_frame_jpg(
     run(cmd)
 
 
+def extract_video_frames_jpg(
+    media_path: str,
+    jpg_paths: List[str],
+    *,
+    timestamps: List[float],
+    target_width: Optional[int] = None,
+) -> List[FrameSize]:
+    if len(jpg_paths) != len(timestamps):
+        raise ValueError("FRAME_PATHS_LENGTH_MISMATCH")
+    if not jpg_paths:
+        return []
+
+    ffmpeg = resolve_ffmpeg_bin()
+    cmd: List[str] = [ffmpeg, "-y", "-hide_banner", "-nostats"]
+    for ts in timestamps:
+        cmd += ["-ss", str(float(ts)), "-i", media_path]
+    scale = ""
+    if target_width is not None and int(target_width) > 0:
+        scale = f"scale={int(target_width)}:-2,"
+    for i, jpg_path in enumerate(jpg_paths):
+        cmd += ["-map", f"{i}:v:0", "-frames:v", "1", "-q:v", "3"]
+        cmd += ["-vf", f"{scale}showinfo@kf{i}"]
+        cmd.append(jpg_path)
+        os.makedirs(os.path.dirname(jpg_path), exist_ok=True)
+    proc = run(cmd)
+
+    sizes = _parse_showinfo_sizes(proc.stderr or "")
+    return [sizes.get(i) for i in range(len(jpg_paths))]
+
+
 def get_jpg_dimensions(jpg_path: str) -> tuple[int, int]:
     with open(jpg_path, "rb") as f:
         data = f.read(256 * 1024)
@@ -237,7 +435,10 @@ def detect_scene_changes(
             f"  detail: {detail[:2000]}"
         )
 
-    text = (proc.stderr or "") + "\n" + (proc.stdout or "")
+    return _parse_scene_scores((proc.stderr or "") + "\n" + (proc.stdout or ""))
+
+
+def _parse_scene_scores(text: str) -> list[tuple[float, float]]:
     out: list[tuple[float, float]] = []
     last_pts_time: Optional[float] = None
     for line in text.splitlines():
@@ -258,3 +459,58 @@ def detect_scene_changes(
                 pass
 
     return out
+
+
+def detect_scene_frames_jpg(
+    media_path: str,
+    out_dir: str,
+    *,
+    scene_threshold: float = 0.3,
+    target_width: Optional[int] = None,
+) -> list[tuple[float, float, str, FrameSize]]:
+    thr = float(scene_threshold)
+    if thr <= 0:
+        thr = 0.3
+    if thr > 1.0:
+        thr = 1.0
+
+    ffmpeg = resolve_ffmpeg_bin()
+    vf = f"select='gt(scene,{thr})',metadata=print"
+    if target_width is not None and int(target_width) > 0:
+        vf += f",scale={int(target_width)}:-2"
+    vf += ",showinfo@kf0"
+    os.makedirs(out_dir, exist_ok=True)
+    pattern = os.path.join(out_dir, "scene_%06d.jpg")
+    cmd: List[str] = [
+        ffmpeg,
+        "-y",
+        "-hide_banner",
+        "-nostats",
+        "-i",
+        media_path,
+        "-vf",
+        vf,
+        "-an",
+        "-vsync",
+        "vfr",
+        "-q:v",
+        "3",
+        "-start_number",
+        "0",
+        pattern,
+    ]
+    proc = run(cmd)
+
+    text = proc.stderr or ""
+    scores = _parse_scene_scores(text)
+    sizes: List[FrameSize] = [
+        (int(m.group(2)), int(m.group(3)))
+        for m in _SHOWINFO_SIZE_RE.finditer(text)
+    ]
+    out: list[tuple[float, float, str, FrameSize]] = []
+    for i, (ts, sc) in enumerate(scores):
+        jpg_path = pattern % i
+        if os.path.exists(jpg_path):
+            size = sizes[i] if len(sizes) == len(scores) else None
+            out.append((ts, sc, jpg_path, size))
+    return out
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import os
 from dataclasses import dataclass
 import json
 from typing import (
@@ -16,6 +15,7 @@ from typing import (
 from urllib.error import HTTPError
 from urllib.request import Request, urlopen
 
+from .runtime_config import get_runtime_config
 from .settings import settings
 
 
@@ -105,10 +105,7 @@ class OpenAICompatibleProvider:
         self._require_enabled = bool(require_enabled)
 
     def _timeout_seconds(self) -> int:
-        try:
-            return max(5, int(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "600")))
-        except Exception:
-            return 600
+        return max(5, int(get_runtime_config().llm_timeout_seconds))
 
     def _assert_allowed(self) -> None:
         if self._require_enabled and not bool(settings.enable_cloud_llm):
@@ -22,6 +22,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
+from .asr import ASR
 from .cloud_summary import summarize
 from .db import init_db
 from .ffmpeg_util import (
@@ -69,7 +70,12 @@ from .repo import (
     set_default_runtime_preferences,
     set_video_status,
 )
-from .paths import audio_wav_path, db_path, keyframes_dir
+from .paths import (
+    audio_wav_path,
+    db_path,
+    delete_keyframe_jpgs,
+    keyframes_dir,
+)
 from .runtime import (
     apply_runtime_preferences,
     get_concurrency_diagnostics,
@@ -78,6 +84,7 @@ from .runtime import (
     limit_llm,
     refresh_runtime_preferences,
 )
+from .runtime_config import get_runtime_config
 from .settings import settings
 from .subtitle import segments_to_srt, segments_to_vtt
 from .transcript_store import (
@@ -90,11 +97,13 @@ from .vector_store import (
     LEGACY_COLLECTION_NAME,
     VectorStoreUnavailable,
     chunks_collection_name,
+    collection_recently_missing,
     delete_video_vectors,
+    mark_collection_missing,
     query_vectors,
 )
 from .embeddings import embed_texts
-from .worker import JobWorker
+from .worker import JobWorker, notify_job_cancelled
 
 
 class UTF8JSONResponse(JSONResponse):
@@ -282,14 +291,11 @@ if _cors_raw:
             allow_headers=["*"],
         )
 
-_worker: Optional[JobWorker] = None
-_worker_thread: Optional[threading.Thread] = None
+_workers: List[JobWorker] = []
+_worker_threads: List[threading.Thread] = []
 
 
 def _startup() -> None:
-    global _worker
-    global _worker_thread
-
     init_db()
     recover_incomplete_state()
     refresh_runtime_preferences()
@@ -302,14 +308,18 @@ def _startup() -> None:
         "YES",
     ):
         return
-    _worker = JobWorker()
-    _worker_thread = threading.Thread(target=_worker.run_forever, daemon=True)
-    _worker_thread.start()
+    asr = ASR()
+    for _ in range(max(1, int(settings.worker_concurrency))):
+        worker = JobWorker(asr=asr)
+        thread = threading.Thread(target=worker.run_forever, daemon=True)
+        _workers.append(worker)
+        _worker_threads.append(thread)
+        thread.start()
 
 
 def _shutdown() -> None:
-    if _worker is not None:
-        _worker.stop()
+    for worker in _workers:
+        worker.stop()
 
 
 @app.get("/health")
@@ -568,7 +578,7 @@ def _asr_required_optional_files() -> tuple[List[str], List[str]]:
 
 @app.get("/asr/models/status")
 def asr_models_status_api() -> Dict[str, Any]:
-    selected = str(os.getenv("ASR_MODEL", settings.asr_model) or "").strip()
+    selected = str(get_runtime_config().asr_model or "").strip()
     model_name = selected or "small"
 
     cache_dir = str(os.getenv("HF_HUB_CACHE", "") or "").strip() or None
@@ -666,7 +676,7 @@ def asr_models_repair_api(req: AsrModelRepairRequest) -> Dict[str, Any]:
     selected = str(
         req.model
         if req.model is not None
-        else os.getenv("ASR_MODEL", settings.asr_model)
+        else get_runtime_config().asr_model
         or ""
     ).strip()
     cache_dir = str(req.cache_dir or "").strip() or None
@@ -1183,15 +1193,7 @@ def create_keyframes_job(
     if bool(req.from_scratch):
         delete_video_keyframes_for_video(video_id)
         delete_video_keyframe_index(video_id)
-        d = keyframes_dir(video_id)
-        if os.path.isdir(d):
-            for name in os.listdir(d):
-                if not str(name).lower().endswith(".jpg"):
-                    continue
-                try:
-                    os.remove(os.path.join(d, name))
-                except Exception:
-                    pass
+        delete_keyframe_jpgs(video_id)
 
     def _normalize_keyframes_params(obj: Dict[str, Any]) -> Dict[str, Any]:
         out: Dict[str, Any] = {}
@@ -1543,6 +1545,43 @@ def list_chunks_api(
     return list_chunks(video_id=video_id, limit=limit, offset=offset)
 
 
+def _query_video_chunks(
+    *,
+    collection_name: str,
+    query_embedding: List[float],
+    top_k: int,
+    video_id: str,
+    query: str,
+) -> Dict[str, Any]:
+    res: Dict[str, Any] = {"_collection_missing": True}
+    try:
+        if not collection_recently_missing(collection_name, video_id, query):
+            res = query_vectors(
+                collection_name=collection_name,
+                query_embedding=query_embedding,
+                top_k=top_k,
+                where={"video_id": video_id},
+                create_if_missing=False,
+            )
+            if bool(res.get("_collection_missing")):
+                mark_collection_missing(collection_name, video_id, query)
+
+        if bool(res.get("_collection_missing")):
+            res = query_vectors(
+                collection_name=LEGACY_COLLECTION_NAME,
+                query_embedding=query_embedding,
+                top_k=top_k,
+                where={"video_id": video_id},
+                create_if_missing=False,
+            )
+    except VectorStoreUnavailable:
+        raise HTTPException(
+            status_code=500,
+            detail="E_VECTOR_STORE_UNAVAILABLE",
+        )
+    return res
+
+
 @app.get("/search")
 def search_api(
     query: str,
@@ -1647,34 +1686,13 @@ def search_api(
 
     collection_name = chunks_collection_name(embed_model, embed_dim)
 
-    try:
-        res = query_vectors(
-            collection_name=collection_name,
-            query_embedding=q_emb,
-            top_k=top_k,
-            where={"video_id": video_id},
-            create_if_missing=False,
-        )
-    except VectorStoreUnavailable:
-        raise HTTPException(
-            status_code=500,
-            detail="E_VECTOR_STORE_UNAVAILABLE",
-        )
-
-    if bool(res.get("_collection_missing")):
-        try:
-            res = query_vectors(
-                collection_name=LEGACY_COLLECTION_NAME,
-                query_embedding=q_emb,
-                top_k=top_k,
-                where={"video_id": video_id},
-                create_if_missing=False,
-            )
-        except VectorStoreUnavailable:
-            raise HTTPException(
-                status_code=500,
-                detail="E_VECTOR_STORE_UNAVAILABLE",
-            )
+    res = _query_video_chunks(
+        collection_name=collection_name,
+        query_embedding=q_emb,
+        top_k=top_k,
+        video_id=video_id,
+        query=q,
+    )
 
     ids = (res.get("ids") or [[]])[0]
     documents = (res.get("documents") or [[]])[0]
@@ -1893,34 +1911,13 @@ def chat_api(req: ChatRequest) -> Response:
 
     collection_name = chunks_collection_name(embed_model, embed_dim)
 
-    try:
-        res = query_vectors(
-            collection_name=collection_name,
-            query_embedding=q_emb,
-            top_k=top_k,
-            where={"video_id": video_id},
-            create_if_missing=False,
-        )
-    except VectorStoreUnavailable:
-        raise HTTPException(
-            status_code=500,
-            detail="E_VECTOR_STORE_UNAVAILABLE",
-        )
-
-    if bool(res.get("_collection_missing")):
-        try:
-            res = query_vectors(
-                collection_name=LEGACY_COLLECTION_NAME,
-                query_embedding=q_emb,
-                top_k=top_k,
-                where={"video_id": video_id},
-                create_if_missing=False,
-            )
-        except VectorStoreUnavailable:
-            raise HTTPException(
-                status_code=500,
-                detail="E_VECTOR_STORE_UNAVAILABLE",
-            )
+    res = _query_video_chunks(
+        collection_name=collection_name,
+        query_embedding=q_emb,
+        top_k=top_k,
+        video_id=video_id,
+        query=q,
+    )
 
     ids = (res.get("ids") or [[]])[0]
     documents = (res.get("documents") or [[]])[0]
@@ -2237,6 +2234,7 @@ def cancel_job_api(job_id: str) -> Dict[str, Any]:
     ok = cancel_job(job_id)
     if not ok:
         raise HTTPException(status_code=400, detail="JOB_NOT_CANCELLABLE")
+    notify_job_cancelled(job_id)
 
     if str(job.get("job_type") or "") == "transcribe":
         set_video_status(job["video_id"], "pending")
@@ -2321,15 +2319,7 @@ def retry_job_api(
         elif str(job.get("job_type") or "") == "keyframes":
             delete_video_keyframes_for_video(job["video_id"])
             delete_video_keyframe_index(job["video_id"])
-            d = keyframes_dir(job["video_id"])
-            if os.path.isdir(d):
-                for name in os.listdir(d):
-                    if not str(name).lower().endswith(".jpg"):
-                        continue
-                    try:
-                        os.remove(os.path.join(d, name))
-                    except Exception:
-                        pass
+            delete_keyframe_jpgs(job["video_id"])
 
     ok = reset_job(job_id)
     if not ok:
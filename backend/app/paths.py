@@ -32,6 +32,10 @@ def transcript_jsonl_path(video_id: str) -> str:
     )
 
 
+def transcript_lastend_path(video_id: str) -> str:
+    return transcript_jsonl_path(video_id) + ".lastend"
+
+
 def audio_wav_path(video_id: str) -> str:
     return os.path.join(
         settings.data_dir,
@@ -50,6 +54,22 @@ def keyframes_dir(video_id: str) -> str:
     )
 
 
+def delete_keyframe_jpgs(video_id: str) -> None:
+    try:
+        it = os.scandir(keyframes_dir(video_id))
+    except OSError:
+        return
+    with it:
+        for entry in it:
+            if not entry.name.lower().endswith(".jpg"):
+                continue
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    os.unlink(entry.path)
+            except OSError:
+                pass
+
+
 def keyframe_jpg_relpath(video_id: str, keyframe_id: str) -> str:
     return os.path.join(
         "storage",
@@ -1,7 +1,11 @@
+import array
 import json
 import os
+import threading
 import uuid
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
 
 from .db import connect
 
@@ -17,20 +21,15 @@ def create_or_get_video(
 ) -> Dict[str, Any]:
     title = os.path.basename(file_path)
     file_size = os.path.getsize(file_path)
+    video_id = str(uuid.uuid4())
     with connect() as conn:
         row = conn.execute(
-            "SELECT * FROM videos WHERE file_hash=?",
-            (file_hash,),
-        ).fetchone()
-        if row:
-            return dict(row)
-
-        video_id = str(uuid.uuid4())
-        conn.execute(
             (
                 "INSERT INTO videos ("
                 "id, file_path, file_hash, title, duration, file_size, status"
-                ") VALUES (?, ?, ?, ?, ?, ?, ?)"
+                ") VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(file_hash) DO NOTHING "
+                "RETURNING *"
             ),
             (
                 video_id,
@@ -41,11 +40,14 @@ def create_or_get_video(
                 int(file_size),
                 "pending",
             ),
-        )
+        ).fetchone()
+        if row:
+            return dict(row)
+
         return dict(
             conn.execute(
-                "SELECT * FROM videos WHERE id=?",
-                (video_id,),
+                "SELECT * FROM videos WHERE file_hash=?",
+                (file_hash,),
             ).fetchone()
         )
 
@@ -93,14 +95,15 @@ def create_job(
                 "pending",
                 0.0,
                 "",
-                json.dumps(params, ensure_ascii=False),
+                orjson.dumps(params).decode("utf-8"),
             ),
         )
         row = conn.execute(
             "SELECT * FROM jobs WHERE id=?",
             (job_id,),
         ).fetchone()
-        return dict(row)
+    notify_pending_job()
+    return dict(row)
 
 
 def get_job(job_id: str) -> Optional[Dict[str, Any]]:
@@ -121,6 +124,35 @@ def delete_job(job_id: str) -> bool:
         return bool(cur.rowcount)
 
 
+_NEXT_PENDING_JOB_WHERE = (
+    "WHERE status='pending' "
+    "AND (job_type!='transcribe' OR "
+    "(SELECT COUNT(*) FROM jobs "
+    "WHERE status='running' "
+    "AND job_type='transcribe') < ?) "
+    "AND (job_type!='summarize' OR "
+    "(SELECT COUNT(*) FROM jobs "
+    "WHERE status='running' "
+    "AND job_type='summarize') < ?) "
+    "AND (job_type NOT IN ('index','keyframes') OR "
+    "(SELECT COUNT(*) FROM jobs "
+    "WHERE status='running' "
+    "AND job_type IN ('index','keyframes')) < ?) "
+    "ORDER BY created_at LIMIT 1"
+)
+
+_pending_job_signal = threading.Event()
+
+
+def notify_pending_job() -> None:
+    _pending_job_signal.set()
+
+
+def wait_for_pending_job(timeout: float) -> None:
+    _pending_job_signal.wait(timeout)
+    _pending_job_signal.clear()
+
+
 def fetch_next_pending_job(
     job_type: Optional[str] = None,
 ) -> Optional[Dict[str, Any]]:
@@ -154,22 +186,7 @@ def fetch_next_pending_job(
             sql += "ORDER BY created_at LIMIT 1"
             row = conn.execute(sql, tuple(params)).fetchone()
         else:
-            sql = (
-                "SELECT * FROM jobs WHERE status='pending' "
-                "AND (job_type!='transcribe' OR "
-                "(SELECT COUNT(*) FROM jobs "
-                "WHERE status='running' "
-                "AND job_type='transcribe') < ?) "
-                "AND (job_type!='summarize' OR "
-                "(SELECT COUNT(*) FROM jobs "
-                "WHERE status='running' "
-                "AND job_type='summarize') < ?) "
-                "AND (job_type NOT IN ('index','keyframes') OR "
-                "(SELECT COUNT(*) FROM jobs "
-                "WHERE status='running' "
-                "AND job_type IN ('index','keyframes')) < ?) "
-                "ORDER BY created_at LIMIT 1"
-            )
+            sql = "SELECT * FROM jobs " + _NEXT_PENDING_JOB_WHERE
             row = conn.execute(
                 sql,
                 (int(asr_limit), int(llm_limit), int(heavy_limit)),
@@ -222,6 +239,24 @@ def claim_pending_job(job_id: str, job_type: Optional[str] = None) -> bool:
         return bool(cur.rowcount)
 
 
+def claim_next_pending_job() -> Optional[Dict[str, Any]]:
+    asr_limit, llm_limit, heavy_limit = _get_job_type_concurrency_limits()
+    with connect() as conn:
+        row = conn.execute(
+            (
+                "UPDATE jobs SET status='running', "
+                "started_at=datetime('now') "
+                ", updated_at=strftime('%Y-%m-%d %H:%M:%f','now') "
+                "WHERE id=(SELECT id FROM jobs "
+                + _NEXT_PENDING_JOB_WHERE
+                + ") AND status='pending' "
+                "RETURNING *"
+            ),
+            (int(asr_limit), int(llm_limit), int(heavy_limit)),
+        ).fetchone()
+        return dict(row) if row else None
+
+
 def _get_job_type_concurrency_limits() -> tuple[int, int, int]:
     try:
         from .runtime import get_effective_runtime_preferences
@@ -245,6 +280,17 @@ def get_job_status(job_id: str) -> Optional[str]:
         return str(row["status"]) if row else None
 
 
+def get_job_run_state(job_id: str) -> Optional[Tuple[str, str]]:
+    with connect() as conn:
+        row = conn.execute(
+            "SELECT status, started_at FROM jobs WHERE id=?",
+            (job_id,),
+        ).fetchone()
+        if not row:
+            return None
+        return str(row["status"] or ""), str(row["started_at"] or "")
+
+
 def cancel_job(job_id: str) -> bool:
     with connect() as conn:
         cur = conn.execute(
@@ -279,36 +325,40 @@ def reset_job(job_id: str) -> bool:
             ),
             (job_id,),
         )
-        return bool(cur.rowcount)
+    if cur.rowcount:
+        notify_pending_job()
+    return bool(cur.rowcount)
 
 
 def recover_incomplete_state() -> None:
     with connect() as conn:
-        conn.execute(
-            "UPDATE jobs SET status='pending', message='recovered' "
-            ", updated_at=strftime('%Y-%m-%d %H:%M:%f','now') "
-            "WHERE status='running'"
-        )
-        conn.execute(
-            "UPDATE video_indexes SET status='pending', message='recovered' "
-            ", updated_at=strftime('%Y-%m-%d %H:%M:%f','now') "
-            "WHERE status='running'"
-        )
-        conn.execute(
-            "UPDATE video_summaries SET status='pending', message='recovered' "
-            ", updated_at=strftime('%Y-%m-%d %H:%M:%f','now') "
-            "WHERE status='running'"
-        )
-        conn.execute(
-            "UPDATE video_keyframe_indexes SET "
-            "status='pending', message='recovered' "
-            ", updated_at=strftime('%Y-%m-%d %H:%M:%f','now') "
-            "WHERE status='running'"
-        )
-        conn.execute(
-            "UPDATE videos SET status='pending' "
-            ", updated_at=strftime('%Y-%m-%d %H:%M:%f','now') "
-            "WHERE status='processing'"
+        conn.executescript(
+            """
+            BEGIN IMMEDIATE;
+
+            UPDATE jobs SET status='pending', message='recovered'
+                , updated_at=strftime('%Y-%m-%d %H:%M:%f','now')
+                WHERE status='running';
+
+            UPDATE video_indexes SET status='pending', message='recovered'
+                , updated_at=strftime('%Y-%m-%d %H:%M:%f','now')
+                WHERE status='running';
+
+            UPDATE video_summaries SET status='pending', message='recovered'
+                , updated_at=strftime('%Y-%m-%d %H:%M:%f','now')
+                WHERE status='running';
+
+            UPDATE video_keyframe_indexes SET
+                status='pending', message='recovered'
+                , updated_at=strftime('%Y-%m-%d %H:%M:%f','now')
+                WHERE status='running';
+
+            UPDATE videos SET status='pending'
+                , updated_at=strftime('%Y-%m-%d %H:%M:%f','now')
+                WHERE status='processing';
+
+            COMMIT;
+            """
         )
 
 
@@ -401,7 +451,7 @@ def update_job(
 
     if result is not None:
         fields.append("result_json=?")
-        values.append(json.dumps(result, ensure_ascii=False))
+        values.append(orjson.dumps(result).decode("utf-8"))
 
     if error_code is not None:
         fields.append("error_code=?")
@@ -695,6 +745,40 @@ def insert_video_keyframe(
         )
 
 
+KeyframeRow = Tuple[
+    str,
+    str,
+    int,
+    str,
+    str,
+    Optional[int],
+    Optional[int],
+    Optional[float],
+    Optional[str],
+]
+
+
+def insert_video_keyframes(rows: List[KeyframeRow]) -> None:
+    if not rows:
+        return
+    with connect() as conn:
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                (
+                    "INSERT INTO video_keyframes ("
+                    "id, video_id, timestamp_ms, image_relpath, method, "
+                    "width, height, score, metadata_json"
+                    ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                ),
+                rows,
+            )
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
 def get_video_keyframe(keyframe_id: str) -> Optional[Dict[str, Any]]:
     with connect() as conn:
         row = conn.execute(
@@ -857,6 +941,7 @@ def upsert_video_index(
     message: str = "",
     embed_model: Optional[str] = None,
     embed_dim: Optional[int] = None,
+    collection_name: Optional[str] = None,
     chunk_params_json: Optional[str] = None,
     transcript_hash: Optional[str] = None,
     chunk_count: int = 0,
@@ -869,15 +954,17 @@ def upsert_video_index(
             (
                 "INSERT INTO video_indexes ("
                 "video_id, status, progress, message, "
-                "embed_model, embed_dim, chunk_params_json, transcript_hash, "
-                "chunk_count, indexed_count, error_code, error_message"
-                ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "embed_model, embed_dim, collection_name, chunk_params_json, "
+                "transcript_hash, chunk_count, indexed_count, "
+                "error_code, error_message"
+                ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
                 "ON CONFLICT(video_id) DO UPDATE SET "
                 "status=excluded.status, "
                 "progress=excluded.progress, "
                 "message=excluded.message, "
                 "embed_model=excluded.embed_model, "
                 "embed_dim=excluded.embed_dim, "
+                "collection_name=excluded.collection_name, "
                 "chunk_params_json=excluded.chunk_params_json, "
                 "transcript_hash=excluded.transcript_hash, "
                 "chunk_count=excluded.chunk_count, "
@@ -893,6 +980,7 @@ def upsert_video_index(
                 message,
                 embed_model,
                 int(embed_dim) if embed_dim is not None else None,
+                collection_name,
                 chunk_params_json,
                 transcript_hash,
                 int(chunk_count),
@@ -1004,6 +1092,140 @@ def insert_chunk(
         )
 
 
+ChunkRow = Tuple[str, str, int, float, float, str, str]
+
+
+def get_chunk_hashes(
+    video_id: str,
+) -> Dict[int, Tuple[float, float, int, str]]:
+    with connect() as conn:
+        rows = conn.execute(
+            (
+                "SELECT chunk_index, start_time, end_time, length(text), "
+                "content_hash FROM chunks WHERE video_id=?"
+            ),
+            (video_id,),
+        ).fetchall()
+    return {
+        int(r[0]): (float(r[1]), float(r[2]), int(r[3]), str(r[4]))
+        for r in rows
+    }
+
+
+_EMBEDDING_CACHE_QUERY_SIZE = 500
+
+
+def get_cached_embeddings(
+    embed_model: str,
+    embed_dim: int,
+    content_hashes: List[str],
+) -> Dict[str, List[float]]:
+    out: Dict[str, List[float]] = {}
+    keys = list(dict.fromkeys(content_hashes))
+    if not keys:
+        return out
+    with connect() as conn:
+        for off in range(0, len(keys), _EMBEDDING_CACHE_QUERY_SIZE):
+            part = keys[off:off + _EMBEDDING_CACHE_QUERY_SIZE]
+            marks = ",".join("?" * len(part))
+            rows = conn.execute(
+                (
+                    "SELECT content_hash, vector FROM embedding_cache "
+                    "WHERE embed_model=? AND embed_dim=? "
+                    f"AND content_hash IN ({marks})"
+                ),
+                (embed_model, int(embed_dim), *part),
+            ).fetchall()
+            for r in rows:
+                vec = array.array("f")
+                vec.frombytes(r[1])
+                if len(vec) == int(embed_dim):
+                    out[str(r[0])] = vec.tolist()
+    return out
+
+
+def put_cached_embeddings(
+    embed_model: str,
+    embed_dim: int,
+    items: List[Tuple[str, List[float]]],
+) -> None:
+    if not items:
+        return
+    rows = [
+        (embed_model, int(embed_dim), h, array.array("f", v).tobytes())
+        for h, v in items
+    ]
+    with connect() as conn:
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                (
+                    "INSERT OR REPLACE INTO embedding_cache ("
+                    "embed_model, embed_dim, content_hash, vector"
+                    ") VALUES (?, ?, ?, ?)"
+                ),
+                rows,
+            )
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+def get_cached_llm_response(cache_key: str) -> Optional[str]:
+    with connect() as conn:
+        row = conn.execute(
+            "SELECT response FROM llm_response_cache WHERE cache_key=?",
+            (cache_key,),
+        ).fetchone()
+    return str(row[0]) if row else None
+
+
+def put_cached_llm_response(
+    cache_key: str,
+    transcript_hash: str,
+    response: str,
+) -> None:
+    with connect() as conn:
+        conn.execute(
+            (
+                "INSERT OR REPLACE INTO llm_response_cache ("
+                "cache_key, transcript_hash, response"
+                ") VALUES (?, ?, ?)"
+            ),
+            (cache_key, transcript_hash, response),
+        )
+
+
+def delete_cached_llm_responses(transcript_hash: str) -> None:
+    with connect() as conn:
+        conn.execute(
+            "DELETE FROM llm_response_cache WHERE transcript_hash=?",
+            (transcript_hash,),
+        )
+
+
+def insert_chunks(rows: List[ChunkRow]) -> None:
+    if not rows:
+        return
+    with connect() as conn:
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                (
+                    "INSERT OR REPLACE INTO chunks ("
+                    "id, video_id, chunk_index, start_time, end_time, text, "
+                    "content_hash"
+                    ") VALUES (?, ?, ?, ?, ?, ?, ?)"
+                ),
+                rows,
+            )
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
 def list_chunks(
     *,
     video_id: str,
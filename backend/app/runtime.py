@@ -1,61 +1,102 @@
 import os
 import threading
 import time
+from collections import deque
 from contextlib import contextmanager
-from typing import Any, Dict, Iterator, Optional
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from .runtime_config import get_runtime_config, update_runtime_config
+from .settings import settings
+
+
+class _Waiter:
+    __slots__ = ("event", "granted")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.granted = False
 
 
 class DynamicSemaphore:
     def __init__(self, max_value: int) -> None:
-        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._waiters: Deque[_Waiter] = deque()
         self._max = max(0, int(max_value))
         self._in_use = 0
 
     def max_value(self) -> int:
-        with self._cond:
+        with self._lock:
             return int(self._max)
 
     def set_max_value(self, max_value: int) -> None:
         new_max = max(0, int(max_value))
-        with self._cond:
+        with self._lock:
             self._max = new_max
-            self._cond.notify_all()
+            if new_max <= 0:
+                while self._waiters:
+                    self._waiters.popleft().event.set()
+                return
+            while self._waiters and self._in_use < new_max:
+                self._grant_next()
+
+    def _grant_next(self) -> None:
+        waiter = self._waiters.popleft()
+        waiter.granted = True
+        self._in_use += 1
+        waiter.event.set()
 
     def acquire(self, timeout_seconds: Optional[float] = None) -> bool:
-        deadline: Optional[float] = None
+        deadline_ns: Optional[int] = None
         if timeout_seconds is not None:
-            deadline = time.monotonic() + float(timeout_seconds)
-
-        with self._cond:
-            while True:
-                if self._max <= 0:
+            deadline_ns = time.monotonic_ns() + int(
+                float(timeout_seconds) * 1_000_000_000
+            )
+
+        with self._lock:
+            if self._max <= 0:
+                return False
+
+            if not self._waiters and self._in_use < self._max:
+                self._in_use += 1
+                return True
+
+            remaining_ns: Optional[int] = None
+            if deadline_ns is not None:
+                remaining_ns = deadline_ns - time.monotonic_ns()
+                if remaining_ns <= 0:
                     return False
 
-                if self._in_use < self._max:
-                    self._in_use += 1
-                    return True
+            waiter = _Waiter()
+            self._waiters.append(waiter)
 
-                if deadline is None:
-                    self._cond.wait()
-                    continue
+        if remaining_ns is None:
+            waiter.event.wait()
+        else:
+            waiter.event.wait(timeout=remaining_ns / 1_000_000_000)
 
-                remaining = deadline - time.monotonic()
-                if remaining <= 0:
-                    return False
-                self._cond.wait(timeout=remaining)
+        with self._lock:
+            if waiter.granted:
+                return True
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            return False
 
     def release(self) -> None:
-        with self._cond:
-            if self._in_use > 0:
-                self._in_use -= 1
-                self._cond.notify()
+        with self._lock:
+            if self._in_use <= 0:
+                return
+            self._in_use -= 1
+            if self._waiters and self._in_use < self._max:
+                self._grant_next()
 
     def in_use(self) -> int:
-        with self._cond:
+        with self._lock:
             return int(self._in_use)
 
     def snapshot(self) -> Dict[str, Any]:
-        with self._cond:
+        with self._lock:
             return {
                 "max": int(self._max),
                 "in_use": int(self._in_use),
@@ -67,28 +108,47 @@ _llm_limiter = DynamicSemaphore(1)
 _heavy_limiter = DynamicSemaphore(1)
 
 
+_timeout_cache: Dict[str, float] = {}
+_timeout_lock = threading.Lock()
+
+
+def _load_timeout(key: str, default: float) -> float:
+    with _timeout_lock:
+        cached = _timeout_cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            value = max(0.0, float(os.getenv(key, str(default))))
+        except Exception:
+            value = float(default)
+        _timeout_cache[key] = value
+        return value
+
+
+def _clear_timeout_cache() -> None:
+    with _timeout_lock:
+        _timeout_cache.clear()
+
+
 def get_llm_concurrency_timeout_seconds() -> float:
-    try:
-        raw = os.getenv("LLM_CONCURRENCY_TIMEOUT_SECONDS", "3")
-        return max(0.0, float(raw))
-    except Exception:
-        return 3.0
+    cached = _timeout_cache.get("LLM_CONCURRENCY_TIMEOUT_SECONDS")
+    if cached is not None:
+        return cached
+    return _load_timeout("LLM_CONCURRENCY_TIMEOUT_SECONDS", 3.0)
 
 
 def get_asr_concurrency_timeout_seconds() -> float:
-    try:
-        raw = os.getenv("ASR_CONCURRENCY_TIMEOUT_SECONDS", "3")
-        return max(0.0, float(raw))
-    except Exception:
-        return 3.0
+    cached = _timeout_cache.get("ASR_CONCURRENCY_TIMEOUT_SECONDS")
+    if cached is not None:
+        return cached
+    return _load_timeout("ASR_CONCURRENCY_TIMEOUT_SECONDS", 3.0)
 
 
 def get_heavy_concurrency_timeout_seconds() -> float:
-    try:
-        raw = os.getenv("HEAVY_CONCURRENCY_TIMEOUT_SECONDS", "3")
-        return max(0.0, float(raw))
-    except Exception:
-        return 3.0
+    cached = _timeout_cache.get("HEAVY_CONCURRENCY_TIMEOUT_SECONDS")
+    if cached is not None:
+        return cached
+    return _load_timeout("HEAVY_CONCURRENCY_TIMEOUT_SECONDS", 3.0)
 
 
 def get_profile_defaults(profile: str) -> Dict[str, Any]:
@@ -124,6 +184,15 @@ def get_profile_defaults(profile: str) -> Dict[str, Any]:
     }
 
 
+_INT_FIELDS = (
+    ("asr_concurrency", 0),
+    ("llm_concurrency", 0),
+    ("heavy_concurrency", 0),
+    ("llm_timeout_seconds", 5),
+)
+_STR_FIELDS = ("asr_device", "asr_compute_type")
+
+
 def get_effective_runtime_preferences(prefs: Dict[str, Any]) -> Dict[str, Any]:
     profile = str(
         (prefs or {}).get("profile") or "balanced"
@@ -142,43 +211,17 @@ def get_effective_runtime_preferences(prefs: Dict[str, Any]) -> Dict[str, Any]:
     if merged["profile"] == "gpu":
         merged["profile"] = "gpu_recommended"
 
-    try:
-        merged["asr_concurrency"] = max(
-            0, int(merged.get("asr_concurrency") or 0)
-        )
-    except Exception:
-        merged["asr_concurrency"] = int(base["asr_concurrency"])
-
-    try:
-        merged["llm_concurrency"] = max(
-            0, int(merged.get("llm_concurrency") or 0)
-        )
-    except Exception:
-        merged["llm_concurrency"] = int(base["llm_concurrency"])
-
-    try:
-        merged["heavy_concurrency"] = max(
-            0, int(merged.get("heavy_concurrency") or 0)
-        )
-    except Exception:
-        merged["heavy_concurrency"] = int(base["heavy_concurrency"])
+    for name, lower in _INT_FIELDS:
+        try:
+            merged[name] = max(lower, int(merged.get(name) or 0))
+        except (TypeError, ValueError, OverflowError):
+            merged[name] = int(base[name])
 
-    try:
-        merged["llm_timeout_seconds"] = max(
-            5, int(merged.get("llm_timeout_seconds") or 0)
-        )
-    except Exception:
-        merged["llm_timeout_seconds"] = int(base["llm_timeout_seconds"])
-
-    merged["asr_device"] = str(
-        merged.get("asr_device") or base["asr_device"]
-    ).strip()
-    merged["asr_compute_type"] = str(
-        merged.get("asr_compute_type") or base["asr_compute_type"]
-    ).strip()
+    for name in _STR_FIELDS:
+        merged[name] = str(merged.get(name) or base[name]).strip()
 
     merged["asr_model"] = str(
-        merged.get("asr_model") or os.getenv("ASR_MODEL", "small")
+        merged.get("asr_model") or get_runtime_config().asr_model
     ).strip()
 
     return merged
@@ -191,23 +234,23 @@ def apply_runtime_preferences(prefs: Dict[str, Any]) -> Dict[str, Any]:
     _llm_limiter.set_max_value(int(eff.get("llm_concurrency") or 0))
     _heavy_limiter.set_max_value(int(eff.get("heavy_concurrency") or 0))
 
-    os.environ["LLM_REQUEST_TIMEOUT_SECONDS"] = str(
-        int(eff.get("llm_timeout_seconds") or 600)
-    )
-    if str(eff.get("asr_device") or "").strip():
-        os.environ["ASR_DEVICE"] = str(eff.get("asr_device") or "").strip()
-    if str(eff.get("asr_compute_type") or "").strip():
-        os.environ["ASR_COMPUTE_TYPE"] = str(
-            eff.get("asr_compute_type") or ""
-        ).strip()
-
+    cfg = get_runtime_config()
+    asr_model = cfg.asr_model
     if isinstance(prefs, dict) and "asr_model" in prefs:
         raw_model = str(prefs.get("asr_model") or "").strip()
-        if raw_model:
-            os.environ["ASR_MODEL"] = raw_model
-        else:
-            os.environ.pop("ASR_MODEL", None)
+        asr_model = raw_model or settings.asr_model
+
+    update_runtime_config(
+        llm_timeout_seconds=int(eff.get("llm_timeout_seconds") or 600),
+        asr_device=str(eff.get("asr_device") or "").strip() or cfg.asr_device,
+        asr_compute_type=(
+            str(eff.get("asr_compute_type") or "").strip()
+            or cfg.asr_compute_type
+        ),
+        asr_model=asr_model,
+    )
 
+    _clear_timeout_cache()
     return eff
 
 
@@ -217,6 +260,10 @@ def refresh_runtime_preferences() -> Dict[str, Any]:
     return apply_runtime_preferences(get_default_runtime_preferences())
 
 
+def get_llm_concurrency_limit() -> int:
+    return _llm_limiter.max_value()
+
+
 @contextmanager
 def limit_asr(timeout_seconds: Optional[float] = None) -> Iterator[None]:
     if not _asr_limiter.acquire(timeout_seconds=timeout_seconds):
@@ -0,0 +1,36 @@
+import os
+import threading
+from dataclasses import dataclass, replace
+from typing import Any
+
+from .settings import settings
+
+
+def _initial_llm_timeout_seconds() -> int:
+    try:
+        return max(5, int(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "600")))
+    except ValueError:
+        return 600
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    llm_timeout_seconds: int = 600
+    asr_device: str = settings.asr_device
+    asr_compute_type: str = settings.asr_compute_type
+    asr_model: str = settings.asr_model
+
+
+_cfg = RuntimeConfig(llm_timeout_seconds=_initial_llm_timeout_seconds())
+_cfg_lock = threading.Lock()
+
+
+def get_runtime_config() -> RuntimeConfig:
+    return _cfg
+
+
+def update_runtime_config(**changes: Any) -> RuntimeConfig:
+    global _cfg
+    with _cfg_lock:
+        _cfg = replace(_cfg, **changes)
+        return _cfg
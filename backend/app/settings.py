@@ -1,6 +1,27 @@
+import functools
 import os
 from dataclasses import dataclass
 
+_TRUTHY = frozenset({"1", "true", "yes", "on"})
+
+
+def _env_bool(name: str, default: str = "0") -> bool:
+    return str(os.getenv(name, default) or "").strip().lower() in _TRUTHY
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return int(default)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return float(default)
+
 
 @dataclass(frozen=True)
 class Settings:
@@ -19,36 +40,37 @@ class Settings:
     asr_device: str = os.getenv("ASR_DEVICE", "cpu")
     asr_compute_type: str = os.getenv("ASR_COMPUTE_TYPE", "int8")
     asr_language: str = os.getenv("ASR_LANGUAGE", "zh")
+    asr_batch_size: int = _env_int("ASR_BATCH_SIZE", 1)
+    asr_vad_min_silence_ms: int = _env_int("ASR_VAD_MIN_SILENCE_MS", 500)
 
-    segment_seconds: int = int(os.getenv("ASR_SEGMENT_SECONDS", "60"))
-    overlap_seconds: int = int(os.getenv("ASR_OVERLAP_SECONDS", "3"))
+    worker_concurrency: int = _env_int("WORKER_CONCURRENCY", 1)
+    prewarm_models: bool = _env_bool("PREWARM_MODELS", "1")
 
-    index_target_window_seconds: float = float(
-        os.getenv("INDEX_TARGET_WINDOW_SECONDS", "45")
-    )
-    index_max_window_seconds: float = float(
-        os.getenv("INDEX_MAX_WINDOW_SECONDS", "60")
+    segment_seconds: int = _env_int("ASR_SEGMENT_SECONDS", 60)
+    overlap_seconds: int = _env_int("ASR_OVERLAP_SECONDS", 3)
+    asr_max_pending_chunks: int = _env_int("ASR_MAX_PENDING_CHUNKS", 2)
+
+    index_target_window_seconds: float = _env_float(
+        "INDEX_TARGET_WINDOW_SECONDS", 45.0
     )
-    index_min_window_seconds: float = float(
-        os.getenv("INDEX_MIN_WINDOW_SECONDS", "20")
+    index_max_window_seconds: float = _env_float(
+        "INDEX_MAX_WINDOW_SECONDS", 60.0
     )
-    index_overlap_seconds: float = float(
-        os.getenv("INDEX_OVERLAP_SECONDS", "5")
+    index_min_window_seconds: float = _env_float(
+        "INDEX_MIN_WINDOW_SECONDS", 20.0
     )
+    index_overlap_seconds: float = _env_float("INDEX_OVERLAP_SECONDS", 5.0)
 
     embedding_model: str = os.getenv(
         "EMBEDDING_MODEL",
         "fastembed:BAAI/bge-small-en-v1.5",
     )
-    embedding_dim: int = int(os.getenv("EMBEDDING_DIM", "384"))
-
-    enable_cloud_summary: bool = os.getenv("ENABLE_CLOUD_SUMMARY", "0") in (
-        "1",
-        "true",
-        "True",
-        "yes",
-        "YES",
-    )
+    embedding_dim: int = _env_int("EMBEDDING_DIM", 384)
+    embedding_batch_size: int = _env_int("EMBEDDING_BATCH_SIZE", 64)
+    embedding_concurrency: int = _env_int("EMBEDDING_CONCURRENCY", 2)
+    vector_upsert_batch_size: int = _env_int("VECTOR_UPSERT_BATCH_SIZE", 256)
+
+    enable_cloud_summary: bool = _env_bool("ENABLE_CLOUD_SUMMARY")
     dashscope_api_key: str = os.getenv("DASHSCOPE_API_KEY", "")
     cloud_llm_model: str = os.getenv("CLOUD_LLM_MODEL", "qwen-plus")
 
@@ -58,13 +80,7 @@ class Settings:
     )
     llm_local_model: str = os.getenv("LLM_LOCAL_MODEL", "llama")
 
-    enable_cloud_llm: bool = os.getenv("ENABLE_CLOUD_LLM", "0") in (
-        "1",
-        "true",
-        "True",
-        "yes",
-        "YES",
-    )
+    enable_cloud_llm: bool = _env_bool("ENABLE_CLOUD_LLM")
     llm_cloud_base_url: str = os.getenv(
         "LLM_CLOUD_BASE_URL",
         "https://api.openai.com/v1",
@@ -73,4 +89,9 @@ class Settings:
     llm_cloud_model: str = os.getenv("LLM_CLOUD_MODEL", "gpt-4o-mini")
 
 
-settings = Settings()
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
+
+
+settings = get_settings()
@@ -1,39 +1,81 @@
-from typing import Any, Dict, Iterable, List
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+_PAD2 = tuple(f"{i:02d}" for i in range(100))
+_PAD3 = tuple(f"{i:03d}" for i in range(1000))
+
+
+def _fmt_ts(h: int, m: int, s: int, ms: int, sep: str) -> str:
+    if 0 <= h < 100:
+        return f"{_PAD2[h]}:{_PAD2[m]}:{_PAD2[s]}{sep}{_PAD3[ms]}"
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def _split_ms(total_ms: int) -> Tuple[int, int, int, int]:
+    rest, ms = divmod(total_ms, 1000)
+    rest, s = divmod(rest, 60)
+    h, m = divmod(rest, 60)
+    return h, m, s, ms
 
 
 def _ts_srt(seconds: float) -> str:
-    ms = int(round(float(seconds) * 1000.0))
-    h = ms // 3_600_000
-    ms -= h * 3_600_000
-    m = ms // 60_000
-    ms -= m * 60_000
-    s = ms // 1000
-    ms -= s * 1000
-    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+    h, m, s, ms = _split_ms(int(round(float(seconds) * 1000.0)))
+    return _fmt_ts(h, m, s, ms, ",")
 
 
 def _ts_vtt(seconds: float) -> str:
-    ms = int(round(float(seconds) * 1000.0))
-    h = ms // 3_600_000
-    ms -= h * 3_600_000
-    m = ms // 60_000
-    ms -= m * 60_000
-    s = ms // 1000
-    ms -= s * 1000
-    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+    h, m, s, ms = _split_ms(int(round(float(seconds) * 1000.0)))
+    return _fmt_ts(h, m, s, ms, ".")
 
 
-def segments_to_srt(segments: Iterable[Dict[str, Any]]) -> str:
-    lines: List[str] = []
-    idx = 0
+def _collect_cues(
+    segments: Iterable[Dict[str, Any]],
+) -> Tuple[List[str], List[float], List[float]]:
+    texts: List[str] = []
+    starts: List[float] = []
+    ends: List[float] = []
     for seg in segments:
         text = (seg.get("text") or "").strip()
         if not text:
             continue
+        texts.append(text)
+        starts.append(float(seg.get("start") or 0.0))
+        ends.append(float(seg.get("end") or 0.0))
+    return texts, starts, ends
+
+
+def _format_timestamps(
+    seconds: List[float],
+    *,
+    sep: str,
+    fallback: Callable[[float], str],
+) -> List[str]:
+    try:
+        import numpy as np  # type: ignore
+    except Exception:
+        return [fallback(v) for v in seconds]
+
+    ms_all = np.rint(np.asarray(seconds, dtype=np.float64) * 1000.0)
+    h, rem = np.divmod(ms_all.astype(np.int64), 3_600_000)
+    m, rem = np.divmod(rem, 60_000)
+    s, ms = np.divmod(rem, 1000)
+    return [
+        _fmt_ts(hh, mm, ss, ms_, sep)
+        for hh, mm, ss, ms_ in zip(
+            h.tolist(), m.tolist(), s.tolist(), ms.tolist()
+        )
+    ]
 
-        idx += 1
-        start = _ts_srt(float(seg.get("start") or 0.0))
-        end = _ts_srt(float(seg.get("end") or 0.0))
+
+def segments_to_srt(segments: Iterable[Dict[str, Any]]) -> str:
+    texts, starts, ends = _collect_cues(segments)
+    start_ts = _format_timestamps(starts, sep=",", fallback=_ts_srt)
+    end_ts = _format_timestamps(ends, sep=",", fallback=_ts_srt)
+
+    lines: List[str] = []
+    for idx, (text, start, end) in enumerate(
+        zip(texts, start_ts, end_ts),
+        start=1,
+    ):
         lines.append(str(idx))
         lines.append(f"{start} --> {end}")
         lines.append(text)
@@ -43,14 +85,12 @@ def segments_to_srt(segments: Iterable[Dict[str, Any]]) -> str:
 
 
 def segments_to_vtt(segments: Iterable[Dict[str, Any]]) -> str:
-    lines: List[str] = ["WEBVTT", ""]
-    for seg in segments:
-        text = (seg.get("text") or "").strip()
-        if not text:
-            continue
+    texts, starts, ends = _collect_cues(segments)
+    start_ts = _format_timestamps(starts, sep=".", fallback=_ts_vtt)
+    end_ts = _format_timestamps(ends, sep=".", fallback=_ts_vtt)
 
-        start = _ts_vtt(float(seg.get("start") or 0.0))
-        end = _ts_vtt(float(seg.get("end") or 0.0))
+    lines: List[str] = ["WEBVTT", ""]
+    for text, start, end in zip(texts, start_ts, end_ts):
         lines.append(f"{start} --> {end}")
         lines.append(text)
         lines.append("")
@@ -1,29 +1,91 @@
-import json
+import itertools
 import os
-from typing import Any, Dict, Iterable, List, Optional
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import orjson
 
 from .hashing import sha256_file
-from .paths import ensure_dirs, transcript_jsonl_path
+from .paths import ensure_dirs, transcript_jsonl_path, transcript_lastend_path
+
+
+def iter_segments(video_id: str) -> Iterator[Dict[str, Any]]:
+    path = transcript_jsonl_path(video_id)
+    if not os.path.exists(path):
+        return
+
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
 
 
 def load_segments(
     video_id: str,
     limit: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
+    it = iter_segments(video_id)
+    if limit is not None:
+        return list(itertools.islice(it, max(0, int(limit))))
+    return list(it)
+
+
+def _read_cached_last_end(video_id: str) -> Optional[float]:
     path = transcript_jsonl_path(video_id)
-    if not os.path.exists(path):
-        return []
+    side = transcript_lastend_path(video_id)
+    try:
+        if os.stat(side).st_mtime_ns < os.stat(path).st_mtime_ns:
+            return None
+        with open(side, "rb") as f:
+            return float(f.read().strip() or b"0")
+    except (OSError, ValueError):
+        return None
 
-    segments: List[Dict[str, Any]] = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            segments.append(json.loads(line))
-            if limit is not None and len(segments) >= limit:
+
+def _write_cached_last_end(video_id: str, last_end: float) -> None:
+    side = transcript_lastend_path(video_id)
+    tmp = side + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(repr(float(last_end)))
+        os.replace(tmp, side)
+    except OSError:
+        return
+
+
+def _read_tail_end(path: str, block_size: int = 4096) -> Optional[float]:
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        if pos < block_size:
+            return None
+
+        buf = b""
+        line = b""
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            tail = buf.rstrip()
+            nl = tail.rfind(b"\n")
+            if nl != -1 or pos == 0:
+                line = tail[nl + 1:]
                 break
-    return segments
+
+    try:
+        return float(orjson.loads(line).get("end", 0.0))
+    except Exception:
+        return None
 
 
 def get_last_end_time(video_id: str) -> float:
@@ -31,19 +93,29 @@ def get_last_end_time(video_id: str) -> float:
     if not os.path.exists(path):
         return 0.0
 
+    cached = _read_cached_last_end(video_id)
+    if cached is not None:
+        return cached
+
+    tail_end = _read_tail_end(path)
+    if tail_end is not None:
+        _write_cached_last_end(video_id, tail_end)
+        return tail_end
+
     last_end = 0.0
-    with open(path, "r", encoding="utf-8") as f:
+    with open(path, "rb") as f:
         for line in f:
-            line = line.strip()
-            if not line:
+            if not line.strip():
                 continue
             try:
-                obj = json.loads(line)
+                obj = orjson.loads(line)
                 end_t = float(obj.get("end", 0.0))
                 if end_t > last_end:
                     last_end = end_t
             except Exception:
                 continue
+
+    _write_cached_last_end(video_id, last_end)
     return last_end
 
 
@@ -51,25 +123,66 @@ def append_segments(video_id: str, segments: Iterable[Dict[str, Any]]) -> None:
     ensure_dirs()
     path = transcript_jsonl_path(video_id)
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "a", encoding="utf-8") as f:
-        for seg in segments:
-            f.write(json.dumps(seg, ensure_ascii=False) + "\n")
+    last_end = get_last_end_time(video_id)
+    lines: List[bytes] = []
+    for seg in segments:
+        lines.append(orjson.dumps(seg))
+        try:
+            end_t = float(seg.get("end", 0.0))
+        except Exception:
+            continue
+        if end_t > last_end:
+            last_end = end_t
+    _hash_cache.pop(path, None)
+    with open(path, "ab", buffering=1 << 20) as f:
+        if lines:
+            lines.append(b"")
+            f.write(b"\n".join(lines))
+    _write_cached_last_end(video_id, last_end)
+
+
+def append_segment_columns(
+    video_id: str,
+    *,
+    starts: Sequence[float],
+    ends: Sequence[float],
+    texts: Sequence[str],
+    languages: Sequence[Optional[str]],
+) -> None:
+    append_segments(
+        video_id,
+        (
+            {"start": s, "end": e, "text": t, "language": lang}
+            for s, e, t, lang in zip(starts, ends, texts, languages)
+        ),
+    )
 
 
 def transcript_exists(video_id: str) -> bool:
     return os.path.exists(transcript_jsonl_path(video_id))
 
 
+_hash_cache: Dict[str, Tuple[int, int, str]] = {}
+
+
 def get_transcript_hash(video_id: str) -> str:
     path = transcript_jsonl_path(video_id)
-    if not os.path.exists(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
         return ""
-    return sha256_file(path)
+
+    cached = _hash_cache.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    digest = sha256_file(path)
+    _hash_cache[path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
 
 
 def delete_transcript(video_id: str) -> None:
     path = transcript_jsonl_path(video_id)
-    try:
-        os.remove(path)
-    except FileNotFoundError:
-        return
+    _hash_cache.pop(path, None)
+    Path(transcript_lastend_path(video_id)).unlink(missing_ok=True)
+    Path(path).unlink(missing_ok=True)
@@ -1,5 +1,9 @@
+import functools
+import importlib
 import re
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 from .paths import chroma_dir
 
@@ -10,25 +14,39 @@ class VectorStoreUnavailable(RuntimeError):
 
 LEGACY_COLLECTION_NAME = "video_chunks"
 
+_SANITIZE_RE = re.compile(r"[^a-z0-9_-]+")
 
+_UPSERT_BATCH_SIZE = 256
+
+_MISSING_COLLECTION_TTL_SECONDS = 5.0
+
+
+@functools.lru_cache(maxsize=32)
 def _sanitize_collection_part(s: str) -> str:
     v = (s or "").strip().lower()
-    v = re.sub(r"[^a-z0-9_-]+", "_", v)
+    v = _SANITIZE_RE.sub("_", v)
     v = v.strip("_")
     return v or "default"
 
 
+@functools.lru_cache(maxsize=32)
 def chunks_collection_name(embed_model: str, embed_dim: int) -> str:
     m = _sanitize_collection_part(embed_model)
     d = int(embed_dim)
     return f"video_chunks__{m}__d{d}"
 
 
+_chromadb_mod: Any = None
+
+
 def _require_chromadb():
-    try:
-        import chromadb  # type: ignore
+    global _chromadb_mod
+    if _chromadb_mod is not None:
+        return _chromadb_mod
 
-        return chromadb
+    try:
+        _chromadb_mod = importlib.import_module("chromadb")
+        return _chromadb_mod
     except Exception as e:
         raise VectorStoreUnavailable(
             f"CHROMADB_NOT_AVAILABLE: {type(e).__name__}: {e}"
@@ -54,17 +72,70 @@ def get_client():
         ) from e
 
 
+_collections: Dict[str, Any] = {}
+_collections_lock = threading.Lock()
+_missing_collections: Dict[Tuple[str, str, str], float] = {}
+
+
+def _forget_collection(name: str) -> None:
+    with _collections_lock:
+        _collections.pop(name, None)
+
+
+def collection_recently_missing(
+    collection_name: str, video_id: str, query: str
+) -> bool:
+    if collection_name in _collections:
+        return False
+    missing_at = _missing_collections.get((collection_name, video_id, query))
+    return (
+        missing_at is not None
+        and time.monotonic() - missing_at <= _MISSING_COLLECTION_TTL_SECONDS
+    )
+
+
+def mark_collection_missing(
+    collection_name: str, video_id: str, query: str
+) -> None:
+    now = time.monotonic()
+    with _collections_lock:
+        expired = [
+            k
+            for k, t in _missing_collections.items()
+            if now - t > _MISSING_COLLECTION_TTL_SECONDS
+        ]
+        for k in expired:
+            del _missing_collections[k]
+        _missing_collections[(collection_name, video_id, query)] = now
+
+
 def get_collection(name: str):
-    try:
-        client = get_client()
-        return client.get_or_create_collection(name=name)
-    except VectorStoreUnavailable:
-        raise
-    except Exception as e:
-        raise VectorStoreUnavailable("CHROMADB_COLLECTION_FAILED") from e
+    col = _collections.get(name)
+    if col is not None:
+        return col
+
+    with _collections_lock:
+        col = _collections.get(name)
+        if col is not None:
+            return col
+        try:
+            client = get_client()
+            col = client.get_or_create_collection(name=name)
+        except VectorStoreUnavailable:
+            raise
+        except Exception as e:
+            raise VectorStoreUnavailable("CHROMADB_COLLECTION_FAILED") from e
+        _collections[name] = col
+        for k in [k for k in _missing_collections if k[0] == name]:
+            del _missing_collections[k]
+        return col
 
 
 def get_collection_existing(name: str):
+    col = _collections.get(name)
+    if col is not None:
+        return col
+
     try:
         client = get_client()
         return client.get_collection(name=name)
@@ -80,12 +151,16 @@ def get_collection_existing(name: str):
 
 
 def delete_video_vectors(*, collection_name: str, video_id: str) -> None:
+    if not video_id:
+        return
+
     try:
         col = get_collection(collection_name)
         col.delete(where={"video_id": video_id})
     except VectorStoreUnavailable:
         raise
     except Exception as e:
+        _forget_collection(collection_name)
         raise VectorStoreUnavailable("CHROMADB_DELETE_FAILED") from e
 
 
@@ -94,20 +169,35 @@ def upsert_vectors(
     collection_name: str,
     ids: List[str],
     documents: List[str],
-    embeddings: List[List[float]],
+    embeddings: Any,
     metadatas: List[Dict[str, Any]],
+    batch_size: int = _UPSERT_BATCH_SIZE,
 ) -> None:
+    if not ids:
+        return
+    n = len(ids)
+    if len(documents) != n or len(embeddings) != n or len(metadatas) != n:
+        raise ValueError("VECTOR_UPSERT_LENGTH_MISMATCH")
+
     try:
         col = get_collection(collection_name)
-        col.upsert(
-            ids=ids,
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas,
-        )
+
+        import numpy as np
+
+        emb = np.ascontiguousarray(embeddings, dtype=np.float32)
+        step = max(1, int(batch_size))
+        for i in range(0, len(ids), step):
+            j = i + step
+            col.upsert(
+                ids=ids[i:j],
+                documents=documents[i:j],
+                embeddings=emb[i:j],
+                metadatas=metadatas[i:j],
+            )
     except VectorStoreUnavailable:
         raise
     except Exception as e:
+        _forget_collection(collection_name)
         raise VectorStoreUnavailable("CHROMADB_UPSERT_FAILED") from e
 
 
@@ -119,6 +209,14 @@ def query_vectors(
     where: Optional[Dict[str, Any]] = None,
     create_if_missing: bool = True,
 ) -> Dict[str, Any]:
+    if int(top_k) <= 0:
+        return {
+            "ids": [[]],
+            "documents": [[]],
+            "metadatas": [[]],
+            "distances": [[]],
+        }
+
     try:
         if create_if_missing:
             col = get_collection(collection_name)
@@ -145,4 +243,5 @@ def query_vectors(
     except VectorStoreUnavailable:
         raise
     except Exception as e:
+        _forget_collection(collection_name)
         raise VectorStoreUnavailable("CHROMADB_QUERY_FAILED") from e
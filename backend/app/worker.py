@@ -1,39 +1,64 @@
+import bisect
 import json
 import os
+import re
 import tempfile
+import threading
 import time
 import traceback
 import uuid
-from dataclasses import replace
-from typing import Any, Dict, List, Optional
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, closing
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import orjson
 
 from .asr import ASR
 from .chunking_v2 import (
+    iter_time_chunks,
     segments_to_time_chunks,
     sha256_text,
 )
 from .embeddings import embed_texts
 from .ffmpeg_util import (
-    detect_scene_changes,
-    extract_audio_wav,
-    extract_video_frame_jpg,
+    FrameSize,
+    detect_scene_frames_jpg,
+    iter_audio_segments,
+    extract_video_frames_jpg,
     get_jpg_dimensions,
 )
 from .llm_provider import ChatMessage, LLMPreferences, get_provider
-from .paths import keyframe_jpg_abspath, keyframe_jpg_relpath, keyframes_dir
+from .paths import (
+    delete_keyframe_jpgs,
+    keyframe_jpg_abspath,
+    keyframe_jpg_relpath,
+    keyframes_dir,
+)
 from .repo import (
-    claim_pending_job,
+    ChunkRow,
+    KeyframeRow,
+    claim_next_pending_job,
+    delete_cached_llm_responses,
     delete_chunks_for_video,
     delete_video_keyframe_index,
     delete_video_keyframes_for_video,
     delete_video_summary,
-    fetch_next_pending_job,
+    get_cached_embeddings,
+    get_cached_llm_response,
+    get_chunk_hashes,
     get_default_llm_preferences,
-    get_job,
     get_video,
+    get_video_summary,
+    get_job_run_state,
     get_job_status,
-    insert_chunk,
-    insert_video_keyframe,
+    get_video_index,
+    insert_chunks,
+    insert_video_keyframes,
+    put_cached_embeddings,
+    put_cached_llm_response,
+    notify_pending_job,
     set_video_status,
     update_video_keyframe_index,
     update_video_index,
@@ -42,20 +67,22 @@ from .repo import (
     upsert_video_keyframe_index,
     upsert_video_summary,
     update_job,
+    wait_for_pending_job,
 )
 from .runtime import limit_asr, limit_heavy, limit_llm
 from .runtime import (
     get_asr_concurrency_timeout_seconds,
     get_heavy_concurrency_timeout_seconds,
-    get_llm_concurrency_timeout_seconds,
+    get_llm_concurrency_limit,
     refresh_runtime_preferences,
 )
 from .settings import settings
 from .transcript_store import (
-    append_segments,
+    append_segment_columns,
     delete_transcript,
     get_transcript_hash,
     get_last_end_time,
+    iter_segments,
     load_segments,
     transcript_exists,
 )
@@ -67,16 +94,180 @@ from .vector_store import (
     upsert_vectors,
 )
 
+_CHUNK_INSERT_BATCH_SIZE = 500
+_PROGRESS_INTERVAL_SECONDS = 0.5
+_TRANSCRIPT_FLUSH_SEGMENTS = 256
+_JOB_POLL_SECONDS = 5.0
+_KEYFRAME_BATCH_SIZE = 32
+_RUN_CHECK_TTL_SECONDS = 1.0
+_SUMMARY_BATCH_MAX_CHARS = 24000
+_LLM_CACHE_MAX_TEMPERATURE = 0.3
+_SUMMARY_UPDATE_SECONDS = 2.0
+_REDUCE_MAX_CHARS = 18000
+_SUMMARY_CHUNK_DEFAULTS = {
+    "target_window_seconds": 120.0,
+    "max_window_seconds": 180.0,
+    "min_window_seconds": 60.0,
+    "overlap_seconds": 10.0,
+}
+
+_ZH_SEG_SYSTEM = (
+    "\u4f60\u662f\u4e00\u4e2a\u89c6\u9891\u5185\u5bb9"
+    "\u6574\u7406\u52a9\u624b\u3002"
+    "\u4f60\u9700\u8981\u5bf9\u89c6\u9891\u8f6c\u5199"
+    "\u7247\u6bb5\u8fdb\u884c\u7b80\u8981\u603b\u7ed3"
+    "\uff0c\u8981\u6c42\u7b80\u6d01\uff0c\u4fdd\u7559"
+    "\u5173\u952e\u4e8b\u5b9e\u3002"
+    "\u8bf7\u7528\u4e2d\u6587\u8f93\u51fa\u3002"
+)
+_ZH_SEG_USER_TMPL = (
+    "\u65f6\u95f4\u8303\u56f4\uff1a{s:.2f}-{e:.2f} \u79d2\n\n"
+    "\u8f6c\u5199\uff1a\n"
+    "{t}\n\n"
+    "\u4efb\u52a1\uff1a\u7528\u8981\u70b9"
+    "\uff08bullet points\uff09\u5199\u4e00\u6bb5"
+    "\u7b80\u77ed\u603b\u7ed3\u3002"
+)
+_EN_SEG_SYSTEM = (
+    "You summarize transcript segments. "
+    "Be concise and keep key facts. Write in English."
+)
+_EN_SEG_USER_TMPL = (
+    "Time range: {s:.2f}-{e:.2f} seconds\n\n"
+    "Transcript:\n"
+    "{t}\n\n"
+    "Task: write a short bullet-point summary."
+)
+
+_ZH_RE = re.compile(r"[\u4e00-\u9fff]")
+_JSON_FENCE_RE = re.compile(r"```\s*(?:json)?(.*?)```", re.S | re.I)
+_JSON_DECODER = json.JSONDecoder()
+_JSON_TRAILING_COMMA_RE = re.compile(r",(\s*[\]}])")
+_JSON_SINGLE_QUOTED_RE = re.compile(
+    r'"(?:[^"\\]|\\.)*"'
+    r"|(?<=[\[{,:])(\s*)'((?:[^\\\n]|\\.)*?)'(?=\s*[,:}\]])"
+)
+_SMART_QUOTES = str.maketrans(
+    {"\u201c": '"', "\u201d": '"', "\u2018": "'", "\u2019": "'"}
+)
+
+_cancel_notices: Set[str] = set()
+_cancel_notices_lock = threading.Lock()
+
+
+def notify_job_cancelled(job_id: str) -> None:
+    with _cancel_notices_lock:
+        _cancel_notices.add(str(job_id))
+
+
+def _pop_cancel_notice(job_id: str) -> bool:
+    with _cancel_notices_lock:
+        if job_id in _cancel_notices:
+            _cancel_notices.discard(job_id)
+            return True
+        return False
+
 
 class JobCancelled(Exception):
     pass
 
 
+@dataclass
+class _RunCheck:
+    __slots__ = ("started_at", "checked_at")
+
+    started_at: str
+    checked_at: float
+
+
+def _pick_scene_frames(
+    cands: List[Tuple[float, float, str, FrameSize]],
+    *,
+    duration: float,
+    min_gap_s: float,
+    max_frames: int,
+) -> List[Tuple[float, float, str, FrameSize]]:
+    ranked = sorted(cands, key=lambda x: float(x[1]), reverse=True)
+    picked_times: List[float] = []
+    picked: List[Tuple[float, float, str, FrameSize]] = []
+    for ts, sc, path, size in ranked:
+        if len(picked_times) >= max_frames:
+            break
+        if ts < 0 or ts > duration:
+            continue
+        ts_f = float(ts)
+        if min_gap_s > 0:
+            i = bisect.bisect_left(picked_times, ts_f)
+            if i < len(picked_times) and picked_times[i] - ts_f < min_gap_s:
+                continue
+            if i > 0 and ts_f - picked_times[i - 1] < min_gap_s:
+                continue
+        i = bisect.bisect_right(picked_times, ts_f)
+        picked_times.insert(i, ts_f)
+        picked.insert(i, (ts_f, float(sc), path, size))
+    return picked
+
+
+def _requote_single_quoted(m: "re.Match[str]") -> str:
+    if m.group(2) is None:
+        return m.group(0)
+    inner = m.group(2).replace("\\'", "'").replace('"', '\\"')
+    return f'{m.group(1)}"{inner}"'
+
+
+def _try_repair_json(raw: str) -> Any:
+    s = str(raw or "").strip().translate(_SMART_QUOTES)
+    if not s:
+        return None
+    s = _JSON_TRAILING_COMMA_RE.sub(r"\1", s)
+    try:
+        return json.loads(s)
+    except ValueError:
+        pass
+
+    s2 = _JSON_SINGLE_QUOTED_RE.sub(_requote_single_quoted, s)
+    try:
+        return json.loads(s2)
+    except ValueError:
+        pass
+
+    try:
+        import json5  # type: ignore
+    except Exception:
+        return None
+    try:
+        return json5.loads(raw)
+    except Exception:
+        return None
+
+
+def _pack_reduce_groups(
+    items: List[Dict[str, Any]],
+    max_chars: int,
+) -> List[List[Dict[str, Any]]]:
+    groups: List[List[Dict[str, Any]]] = []
+    cur: List[Dict[str, Any]] = []
+    size = 2
+    for item in items:
+        n = len(orjson.dumps(item).decode("utf-8")) + 1
+        if cur and size + n > max_chars:
+            groups.append(cur)
+            cur = []
+            size = 2
+        cur.append(item)
+        size += n
+    if cur:
+        groups.append(cur)
+    return groups
+
+
 class JobWorker:
-    def __init__(self) -> None:
+    def __init__(self, asr: Optional[ASR] = None) -> None:
         self._stop = False
-        self._asr = ASR()
+        self._asr = asr if asr is not None else ASR()
         self._last_runtime_refresh_ts = 0.0
+        self._run_checks: Dict[str, _RunCheck] = {}
+        self._job_update_ts: Dict[str, float] = {}
 
     def _maybe_refresh_runtime_preferences(self) -> None:
         now = time.monotonic()
@@ -88,42 +279,82 @@ class JobWorker:
         except Exception:
             pass
 
-    def _ensure_same_run(self, job_id: str, started_at: str) -> Dict[str, Any]:
-        job = get_job(job_id)
-        if not job:
+    def _ensure_same_run(
+        self,
+        job_id: str,
+        started_at: str,
+        force: bool = False,
+    ) -> None:
+        now = time.monotonic()
+        started_at = str(started_at or "")
+        if not _pop_cancel_notice(job_id) and not force:
+            cached = self._run_checks.get(job_id)
+            if (
+                cached is not None
+                and cached.started_at == started_at
+                and now - cached.checked_at < _RUN_CHECK_TTL_SECONDS
+            ):
+                return
+
+        state = get_job_run_state(job_id)
+        if state is None:
             raise RuntimeError(f"job not found: {job_id}")
 
-        if str(job.get("status") or "") != "running":
+        status, current_started_at = state
+        if status != "running" or current_started_at != started_at:
+            self._run_checks.pop(job_id, None)
             raise JobCancelled()
 
-        if str(job.get("started_at") or "") != str(started_at or ""):
-            raise JobCancelled()
+        self._run_checks[job_id] = _RunCheck(started_at, now)
 
-        return job
+    def _maybe_update_job(self, job_id: str, **fields: Any) -> bool:
+        now = time.monotonic()
+        last = self._job_update_ts.get(job_id)
+        if (
+            "status" not in fields
+            and last is not None
+            and now - last < _PROGRESS_INTERVAL_SECONDS
+        ):
+            return False
+        self._job_update_ts[job_id] = now
+        if "status" in fields:
+            self._run_checks.pop(job_id, None)
+        update_job(job_id, **fields)
+        return True
 
     def stop(self) -> None:
         self._stop = True
 
+    def _prewarm(self) -> None:
+        if not settings.prewarm_models:
+            return
+        try:
+            self._asr.warmup()
+        except Exception:
+            pass
+        try:
+            embed_texts(
+                ["warmup"],
+                model=settings.embedding_model,
+                dim=settings.embedding_dim,
+            )
+        except Exception:
+            pass
+
     def run_forever(self) -> None:
         self._maybe_refresh_runtime_preferences()
+        self._prewarm()
         while not self._stop:
             self._maybe_refresh_runtime_preferences()
-            job = fetch_next_pending_job()
+            job = claim_next_pending_job()
             if not job:
-                time.sleep(0.5)
+                wait_for_pending_job(_JOB_POLL_SECONDS)
                 continue
 
             job_id = job["id"]
             video_id = job["video_id"]
             job_type = str(job.get("job_type") or "")
-
-            self._maybe_refresh_runtime_preferences()
-
-            if not claim_pending_job(job_id, job_type):
-                continue
-
-            claimed = get_job(job_id) or {}
-            claimed_started_at = str(claimed.get("started_at") or "")
+            claimed_started_at = str(job.get("started_at") or "")
             if not claimed_started_at:
                 update_job(
                     job_id,
@@ -286,6 +517,11 @@ class JobWorker:
                         ),
                         error_message=detail[:2000],
                     )
+            finally:
+                self._run_checks.pop(job_id, None)
+                self._job_update_ts.pop(job_id, None)
+                _pop_cancel_notice(job_id)
+                notify_pending_job()
 
     def _run_keyframes(
         self,
@@ -304,7 +540,7 @@ class JobWorker:
 
         params: Dict[str, Any] = {}
         try:
-            params = json.loads(job.get("params_json") or "{}")
+            params = orjson.loads(job.get("params_json") or "{}")
         except Exception:
             params = {}
 
@@ -341,18 +577,9 @@ class JobWorker:
         if bool(params.get("from_scratch")):
             delete_video_keyframes_for_video(video_id)
             delete_video_keyframe_index(video_id)
+            delete_keyframe_jpgs(video_id)
 
-            d = keyframes_dir(video_id)
-            if os.path.isdir(d):
-                for name in os.listdir(d):
-                    if not str(name).lower().endswith(".jpg"):
-                        continue
-                    try:
-                        os.remove(os.path.join(d, name))
-                    except Exception:
-                        pass
-
-        params_json = json.dumps(params, ensure_ascii=False)
+        params_json = orjson.dumps(params).decode("utf-8")
         upsert_video_keyframe_index(
             video_id=video_id,
             status="running",
@@ -367,87 +594,134 @@ class JobWorker:
             raise RuntimeError("E_VIDEO_DURATION_INVALID")
 
         times: list[tuple[float, Optional[float]]] = []
+        keyframe_ids: List[str] = []
+        frame_sizes: List[FrameSize] = []
+        scene_picked = False
         if mode == "interval":
             t = 0.0
             while t < duration and len(times) < max_frames:
-                times.append((float(t), None))
+                times.append((t, None))
                 t += interval_s
         else:
-            cands = detect_scene_changes(
-                media_path,
-                scene_threshold=scene_threshold,
-            )
-            ranked = sorted(cands, key=lambda x: float(x[1]), reverse=True)
-            picked: list[tuple[float, float]] = []
-            for ts, sc in ranked:
-                if len(picked) >= max_frames:
-                    break
-                if ts < 0 or ts > duration:
-                    continue
-                if min_gap_s > 0:
-                    too_close = any(abs(ts - p[0]) < min_gap_s for p in picked)
-                    if too_close:
-                        continue
-                picked.append((float(ts), float(sc)))
-            picked.sort(key=lambda x: float(x[0]))
-            times = [(float(ts), float(sc)) for ts, sc in picked]
+            kf_dir = keyframes_dir(video_id)
+            os.makedirs(kf_dir, exist_ok=True)
+            with tempfile.TemporaryDirectory(
+                prefix="scene_",
+                dir=kf_dir,
+            ) as scene_dir:
+                cands = detect_scene_frames_jpg(
+                    media_path,
+                    scene_dir,
+                    scene_threshold=scene_threshold,
+                    target_width=target_width_i,
+                )
+                self._ensure_same_run(job_id, claimed_started_at, force=True)
+                picked = _pick_scene_frames(
+                    cands,
+                    duration=duration,
+                    min_gap_s=min_gap_s,
+                    max_frames=max_frames,
+                )
+                for ts, sc, src, size in picked:
+                    kid = str(uuid.uuid4())
+                    os.replace(src, keyframe_jpg_abspath(video_id, kid))
+                    keyframe_ids.append(kid)
+                    times.append((ts, sc))
+                    frame_sizes.append(size)
+            scene_picked = bool(times)
 
         if not times:
             times = [(0.0, None)]
 
         n = len(times)
-        for i, (ts, score) in enumerate(times, start=1):
-            if self._stop:
-                raise RuntimeError("worker stopped")
-            self._ensure_same_run(job_id, claimed_started_at)
-
-            p = min(0.99, float(i - 1) / max(n, 1))
-            if mode == "scene" and score is not None:
-                msg = f"frame {i}/{n} score={float(score):.3f}"
-            else:
-                msg = f"frame {i}/{n}"
-            update_job(job_id, progress=p, message=msg)
-            update_video_keyframe_index(
-                video_id,
-                status="running",
-                progress=p,
-                message=msg,
-                params_json=params_json,
-                frame_count=i - 1,
-            )
-
-            keyframe_id = str(uuid.uuid4())
-            jpg_relpath = keyframe_jpg_relpath(video_id, keyframe_id)
-            jpg_abspath = keyframe_jpg_abspath(video_id, keyframe_id)
-            extract_video_frame_jpg(
-                media_path,
-                jpg_abspath,
-                timestamp_seconds=float(ts),
-                target_width=target_width_i,
-            )
-
-            width_i: Any = None
-            height_i: Any = None
+        if not scene_picked:
+            keyframe_ids = [str(uuid.uuid4()) for _ in times]
+            frame_sizes = [None] * n
+        jpg_abspaths = [
+            keyframe_jpg_abspath(video_id, kid) for kid in keyframe_ids
+        ]
+        extract_workers = max(1, min(os.cpu_count() or 1, 4))
+        batch_size = max(
+            1,
+            min(_KEYFRAME_BATCH_SIZE, -(-n // extract_workers)),
+        )
+        offsets = list(range(0, n, batch_size))
+
+        with ThreadPoolExecutor(max_workers=extract_workers) as pool:
+            futures: List[Optional[Future]] = [
+                None
+                if scene_picked
+                else pool.submit(
+                    extract_video_frames_jpg,
+                    media_path,
+                    jpg_abspaths[off:off + batch_size],
+                    timestamps=[ts for ts, _ in times[off:off + batch_size]],
+                    target_width=target_width_i,
+                )
+                for off in offsets
+            ]
             try:
-                w, h = get_jpg_dimensions(jpg_abspath)
-                width_i = int(w)
-                height_i = int(h)
-            except Exception:
-                width_i = None
-                height_i = None
-
-            insert_video_keyframe(
-                id=keyframe_id,
-                video_id=video_id,
-                timestamp_ms=int(round(float(ts) * 1000.0)),
-                image_relpath=jpg_relpath,
-                method=mode,
-                width=width_i,
-                height=height_i,
-                score=float(score) if score is not None else None,
-            )
+                last_progress_ts: Optional[float] = None
+                for off, fut in zip(offsets, futures):
+                    if self._stop:
+                        raise RuntimeError("worker stopped")
+                    self._ensure_same_run(job_id, claimed_started_at)
+
+                    end = min(n, off + batch_size)
+                    now = time.monotonic()
+                    if (
+                        last_progress_ts is None
+                        or now - last_progress_ts > _PROGRESS_INTERVAL_SECONDS
+                    ):
+                        last_progress_ts = now
+                        p = min(0.99, off / n)
+                        msg = f"frames {off + 1}-{end}/{n}"
+                        update_job(job_id, progress=p, message=msg)
+                        update_video_keyframe_index(
+                            video_id,
+                            status="running",
+                            progress=p,
+                            message=msg,
+                            params_json=params_json,
+                            frame_count=off,
+                        )
 
-        self._ensure_same_run(job_id, claimed_started_at)
+                    if fut is not None:
+                        frame_sizes[off:end] = fut.result()
+
+                    rows: List[KeyframeRow] = []
+                    for k in range(off, end):
+                        ts, score = times[k]
+                        size = frame_sizes[k]
+                        if size is None:
+                            try:
+                                size = get_jpg_dimensions(jpg_abspaths[k])
+                            except Exception:
+                                size = None
+                        width_i = size[0] if size is not None else None
+                        height_i = size[1] if size is not None else None
+
+                        rows.append(
+                            (
+                                keyframe_ids[k],
+                                video_id,
+                                int(round(ts * 1000.0)),
+                                keyframe_jpg_relpath(video_id, keyframe_ids[k]),
+                                mode,
+                                width_i,
+                                height_i,
+                                score,
+                                None,
+                            )
+                        )
+                    insert_video_keyframes(rows)
+            except BaseException:
+                for fut in futures:
+                    if fut is not None:
+                        fut.cancel()
+                raise
+
+        self._ensure_same_run(job_id, claimed_started_at, force=True)
         update_job(job_id, progress=0.99, message="finalizing")
         update_video_keyframe_index(
             video_id,
@@ -475,7 +749,7 @@ class JobWorker:
 
         params = {}
         try:
-            params = json.loads(job.get("params_json") or "{}")
+            params = orjson.loads(job.get("params_json") or "{}")
         except Exception:
             params = {}
 
@@ -489,83 +763,125 @@ class JobWorker:
             params.get("overlap_seconds") or settings.overlap_seconds
         )
 
+        import numpy as np
+
         last_end = float(get_last_end_time(video_id))
         resume_from = last_end
         start = max(0.0, last_end - float(overlap_s)) if last_end > 0 else 0.0
+        duration_div = max(duration, 1e-6)
 
-        chunk_index = 0
-        while start < duration:
-            if self._stop:
-                raise RuntimeError("worker stopped")
-
-            self._ensure_same_run(job_id, claimed_started_at)
+        if start >= duration:
+            self._ensure_same_run(job_id, claimed_started_at, force=True)
+            update_job(job_id, message="finalizing")
+            return
 
-            chunk_index += 1
-            chunk_dur = min(float(segment_s), duration - start)
+        pending_starts: List[float] = []
+        pending_ends: List[float] = []
+        pending_texts: List[str] = []
+        pending_languages: List[Optional[str]] = []
 
-            self._ensure_same_run(job_id, claimed_started_at)
+        def _flush_segments() -> None:
+            if not pending_starts:
+                return
+            append_segment_columns(
+                video_id,
+                starts=pending_starts,
+                ends=pending_ends,
+                texts=pending_texts,
+                languages=pending_languages,
+            )
+            pending_starts.clear()
+            pending_ends.clear()
+            pending_texts.clear()
+            pending_languages.clear()
+
+        with ExitStack() as stack:
+            td = stack.enter_context(
+                tempfile.TemporaryDirectory(prefix="edge_video_asr_")
+            )
+            self._ensure_same_run(job_id, claimed_started_at, force=True)
             update_job(
                 job_id,
-                progress=min(0.999, start / max(duration, 1e-6)),
-                message=(
-                    f"extract_audio chunk={chunk_index} "
-                    f"start={start:.1f}s"
-                ),
+                progress=min(0.999, start / duration_div),
+                message=f"extract_audio start={start:.1f}s",
             )
-
-            with tempfile.TemporaryDirectory(prefix="edge_video_asr_") as td:
-                self._ensure_same_run(job_id, claimed_started_at)
-                wav_path = os.path.join(td, "chunk.wav")
-                extract_audio_wav(
-                    media_path,
-                    wav_path,
-                    start_seconds=float(start),
-                    duration_seconds=float(chunk_dur),
+            wav_chunks = stack.enter_context(
+                closing(
+                    iter_audio_segments(
+                        media_path,
+                        td,
+                        segment_seconds=float(segment_s),
+                        start_seconds=start,
+                        max_pending=max(1, settings.asr_max_pending_chunks),
+                    )
                 )
+            )
 
-                self._ensure_same_run(job_id, claimed_started_at)
-                update_job(
-                    job_id,
-                    progress=min(0.999, start / max(duration, 1e-6)),
-                    message=f"transcribe chunk={chunk_index}",
-                )
+            try:
+                for chunk_index, (wav_path, rel_start, rel_end) in enumerate(
+                    wav_chunks,
+                    start=1,
+                ):
+                    if self._stop:
+                        raise RuntimeError("worker stopped")
+
+                    chunk_start = start + rel_start
+                    self._ensure_same_run(job_id, claimed_started_at)
+                    if self._maybe_update_job(
+                        job_id,
+                        progress=min(0.999, chunk_start / duration_div),
+                        message=f"transcribe chunk={chunk_index}",
+                    ):
+                        _flush_segments()
 
-                self._ensure_same_run(job_id, claimed_started_at)
+                    self._ensure_same_run(job_id, claimed_started_at)
 
-                with limit_asr(
-                    timeout_seconds=get_asr_concurrency_timeout_seconds()
-                ):
-                    segments, info = self._asr.transcribe_wav(wav_path)
+                    with limit_asr(
+                        timeout_seconds=get_asr_concurrency_timeout_seconds()
+                    ):
+                        segments, info = self._asr.transcribe_wav(wav_path)
 
-                self._ensure_same_run(job_id, claimed_started_at)
+                    self._ensure_same_run(job_id, claimed_started_at, force=True)
 
-                out = []
-                for seg in segments:
-                    abs_start = float(start) + float(seg.start)
-                    abs_end = float(start) + float(seg.end)
-                    if abs_end <= resume_from:
-                        continue
-                    out.append(
-                        {
-                            "start": abs_start,
-                            "end": abs_end,
-                            "text": (seg.text or "").strip(),
-                            "language": getattr(info, "language", None),
-                        }
-                    )
+                    seg_list = list(segments)
+                    if seg_list:
+                        n = len(seg_list)
+                        abs_starts = chunk_start + np.fromiter(
+                            (s.start for s in seg_list), dtype=np.float64, count=n
+                        )
+                        abs_ends = chunk_start + np.fromiter(
+                            (s.end for s in seg_list), dtype=np.float64, count=n
+                        )
+                        keep = np.flatnonzero(abs_ends > resume_from).tolist()
+                        if keep:
+                            language = getattr(info, "language", None)
+                            pending_starts.extend(abs_starts[keep].tolist())
+                            pending_ends.extend(abs_ends[keep].tolist())
+                            pending_texts.extend(
+                                (seg_list[i].text or "").strip() for i in keep
+                            )
+                            pending_languages.extend([language] * len(keep))
+
+                    if len(pending_starts) >= _TRANSCRIPT_FLUSH_SEGMENTS:
+                        _flush_segments()
 
-                if out:
-                    append_segments(video_id, out)
+                    try:
+                        os.remove(wav_path)
+                    except OSError:
+                        pass
 
-            start = float(start) + float(chunk_dur)
-            self._ensure_same_run(job_id, claimed_started_at)
-            update_job(
-                job_id,
-                progress=min(0.999, start / max(duration, 1e-6)),
-                message=f"chunk_done chunk={chunk_index}",
-            )
+                    done = start + rel_end
+                    self._ensure_same_run(job_id, claimed_started_at)
+                    if self._maybe_update_job(
+                        job_id,
+                        progress=min(0.999, done / duration_div),
+                        message=f"chunk_done chunk={chunk_index}",
+                    ):
+                        _flush_segments()
+            finally:
+                _flush_segments()
 
-        self._ensure_same_run(job_id, claimed_started_at)
+        self._ensure_same_run(job_id, claimed_started_at, force=True)
         update_job(job_id, message="finalizing")
 
     def _run_index(
@@ -582,7 +898,7 @@ class JobWorker:
 
         params: Dict[str, Any] = {}
         try:
-            params = json.loads(job.get("params_json") or "{}")
+            params = orjson.loads(job.get("params_json") or "{}")
         except Exception:
             params = {}
 
@@ -614,7 +930,7 @@ class JobWorker:
             "min_window_seconds": min_window,
             "overlap_seconds": overlap_s,
         }
-        chunk_params_json = json.dumps(chunk_params, ensure_ascii=False)
+        chunk_params_json = orjson.dumps(chunk_params).decode("utf-8")
 
         from_scratch = bool(params.get("from_scratch"))
         collection_name = chunks_collection_name(embed_model, embed_dim)
@@ -645,6 +961,7 @@ class JobWorker:
                 message="failed",
                 embed_model=embed_model,
                 embed_dim=embed_dim,
+                collection_name=collection_name,
                 chunk_params_json=chunk_params_json,
                 error_code="TRANSCRIPT_NOT_FOUND",
                 error_message="transcript missing",
@@ -659,8 +976,7 @@ class JobWorker:
             )
             return
 
-        segs = load_segments(video_id)
-        if not segs:
+        if not load_segments(video_id, limit=1):
             upsert_video_index(
                 video_id=video_id,
                 status="failed",
@@ -668,6 +984,7 @@ class JobWorker:
                 message="failed",
                 embed_model=embed_model,
                 embed_dim=embed_dim,
+                collection_name=collection_name,
                 chunk_params_json=chunk_params_json,
                 error_code="TRANSCRIPT_NOT_FOUND",
                 error_message="transcript empty",
@@ -685,6 +1002,24 @@ class JobWorker:
         self._ensure_same_run(job_id, claimed_started_at)
         transcript_hash = get_transcript_hash(video_id)
 
+        known_hashes: Dict[int, Tuple[float, float, int, str]] = {}
+        same_source = False
+        vectors_reusable = False
+        if not from_scratch:
+            prev = get_video_index(video_id) or {}
+            if prev:
+                known_hashes = get_chunk_hashes(video_id)
+            same_source = (
+                prev.get("transcript_hash") == transcript_hash
+                and prev.get("chunk_params_json") == chunk_params_json
+            )
+            vectors_reusable = (
+                prev.get("status") == "completed"
+                and prev.get("embed_model") == embed_model
+                and int(prev.get("embed_dim") or 0) == embed_dim
+                and prev.get("collection_name") == collection_name
+            )
+
         upsert_video_index(
             video_id=video_id,
             status="running",
@@ -692,6 +1027,7 @@ class JobWorker:
             message="chunking",
             embed_model=embed_model,
             embed_dim=embed_dim,
+            collection_name=collection_name,
             chunk_params_json=chunk_params_json,
             transcript_hash=transcript_hash,
             chunk_count=0,
@@ -700,199 +1036,397 @@ class JobWorker:
 
         update_job(job_id, progress=0.0, message="chunking")
 
-        chunks = segments_to_time_chunks(
-            segs,
-            target_window_seconds=target_window,
-            max_window_seconds=max_window,
-            min_window_seconds=min_window,
-            overlap_seconds=overlap_s,
+        duration = max(float(video.get("duration") or 0.0), 1e-6)
+        ids: List[str] = []
+        documents: List[str] = []
+        chunk_indexes: List[int] = []
+        start_times: List[float] = []
+        end_times: List[float] = []
+        content_hashes: List[str] = []
+        embed_positions: List[int] = []
+        pending_rows: List[ChunkRow] = []
+        last_progress_ts = time.monotonic()
+        chunk_total = 0
+        embed_batch_size = max(
+            1,
+            int(
+                params.get("embedding_batch_size")
+                or settings.embedding_batch_size
+            ),
         )
+        embed_concurrency = max(
+            1,
+            int(
+                params.get("embedding_concurrency")
+                or settings.embedding_concurrency
+            ),
+        )
+        embed_pool = ThreadPoolExecutor(max_workers=embed_concurrency)
+        embed_futures: Deque[Tuple[List[int], Future]] = deque()
+        embed_submitted = 0
+        embed_error: Optional[Exception] = None
+        upsert_batch_size = max(
+            1,
+            int(
+                params.get("upsert_batch_size")
+                or settings.vector_upsert_batch_size
+            ),
+        )
+        upsert_positions: List[int] = []
+        upsert_vectors_buf: List[List[float]] = []
+        upsert_error: Optional[VectorStoreUnavailable] = None
+        upserted = 0
+        report_upserts = False
+        last_upsert_report_ts = time.monotonic()
+
+        use_embed_cache = embed_model.strip().lower() != "hash"
+
+        def _embed_cached(
+            texts: List[str],
+            hashes: List[str],
+        ) -> List[List[float]]:
+            cached: Dict[str, List[float]] = {}
+            if not from_scratch:
+                cached = get_cached_embeddings(embed_model, embed_dim, hashes)
+            misses = [i for i, h in enumerate(hashes) if h not in cached]
+            if misses:
+                vecs = embed_texts(
+                    [texts[i] for i in misses],
+                    model=embed_model,
+                    dim=embed_dim,
+                )
+                items = [(hashes[i], v) for i, v in zip(misses, vecs)]
+                put_cached_embeddings(embed_model, embed_dim, items)
+                cached.update(items)
+            return [cached[h] for h in hashes]
+
+        def _submit_embed_batch() -> None:
+            nonlocal embed_submitted
+            positions = embed_positions[embed_submitted:]
+            if not positions:
+                return
+            batch = [documents[i] for i in positions]
+            if use_embed_cache:
+                fut = embed_pool.submit(
+                    _embed_cached,
+                    batch,
+                    [content_hashes[i] for i in positions],
+                )
+            else:
+                fut = embed_pool.submit(
+                    embed_texts,
+                    batch,
+                    model=embed_model,
+                    dim=embed_dim,
+                )
+            embed_futures.append((positions, fut))
+            embed_submitted = len(embed_positions)
+
+        def _flush_upserts(flush_all: bool) -> None:
+            nonlocal upsert_error, upserted, last_upsert_report_ts
+            while upsert_error is None and (
+                len(upsert_positions) >= upsert_batch_size
+                or (flush_all and upsert_positions)
+            ):
+                window = upsert_positions[:upsert_batch_size]
+                try:
+                    upsert_vectors(
+                        collection_name=collection_name,
+                        ids=[ids[i] for i in window],
+                        documents=[documents[i] for i in window],
+                        embeddings=upsert_vectors_buf[:len(window)],
+                        metadatas=_metadatas(window),
+                        batch_size=upsert_batch_size,
+                    )
+                except VectorStoreUnavailable as e:
+                    upsert_error = e
+                    return
+                del upsert_positions[:len(window)]
+                del upsert_vectors_buf[:len(window)]
+                upserted += len(window)
+
+                now = time.monotonic()
+                if (
+                    report_upserts
+                    and now - last_upsert_report_ts
+                    > _PROGRESS_INTERVAL_SECONDS
+                ):
+                    last_upsert_report_ts = now
+                    total = max(len(embed_positions), 1)
+                    p = 0.3 + 0.69 * upserted / total
+                    msg = f"embedding {upserted}/{len(embed_positions)}"
+                    update_job(job_id, progress=p, message=msg)
+                    update_video_index(
+                        video_id,
+                        progress=p,
+                        message=msg,
+                        indexed_count=len(ids) - len(embed_positions)
+                        + upserted,
+                    )
 
-        if not chunks:
-            upsert_video_index(
-                video_id=video_id,
-                status="failed",
-                progress=0.0,
-                message="failed",
-                embed_model=embed_model,
-                embed_dim=embed_dim,
-                chunk_params_json=chunk_params_json,
-                transcript_hash=transcript_hash,
-                error_code="E_CHUNKING_FAILED",
-                error_message="no chunks generated",
-            )
-            update_job(
-                job_id,
-                status="failed",
-                progress=0.0,
-                message="failed",
-                error_code="E_CHUNKING_FAILED",
-                error_message="no chunks generated",
-            )
-            return
-
-        ids = []
-        documents = []
-        metadatas = []
-        texts_for_embed = []
-
-        for idx, ch in enumerate(chunks, start=1):
-            self._ensure_same_run(job_id, claimed_started_at)
-
-            start_time = float(ch["start_time"])
-            end_time = float(ch["end_time"])
-            text = str(ch["text"] or "").strip()
-            if not text:
-                continue
-
-            chunk_id = f"{video_id}:{idx}"
-            content_hash = sha256_text(text)
-
-            insert_chunk(
-                chunk_id=chunk_id,
-                video_id=video_id,
-                chunk_index=int(idx),
-                start_time=start_time,
-                end_time=end_time,
-                text=text,
-                content_hash=content_hash,
-            )
-
-            ids.append(chunk_id)
-            documents.append(text)
-            texts_for_embed.append(text)
-            metadatas.append(
+        def _drain_embeds(keep: int) -> None:
+            nonlocal embed_error
+            while (
+                embed_error is None
+                and upsert_error is None
+                and len(embed_futures) > keep
+            ):
+                if report_upserts:
+                    self._ensure_same_run(job_id, claimed_started_at)
+                positions, fut = embed_futures.popleft()
+                try:
+                    vecs = fut.result()
+                except Exception as e:
+                    embed_error = e
+                    return
+                upsert_positions.extend(positions)
+                upsert_vectors_buf.extend(vecs)
+                _flush_upserts(False)
+
+        def _metadatas(positions: List[int]) -> List[Dict[str, Any]]:
+            return [
                 {
                     "video_id": video_id,
-                    "chunk_index": int(idx),
-                    "start_time": start_time,
-                    "end_time": end_time,
-                    "content_hash": content_hash,
+                    "chunk_index": chunk_indexes[i],
+                    "start_time": start_times[i],
+                    "end_time": end_times[i],
+                    "content_hash": content_hashes[i],
                     "embed_model": embed_model,
                 }
-            )
+                for i in positions
+            ]
 
-            if idx % 20 == 0:
-                p = min(0.25, float(idx) / max(len(chunks), 1) * 0.25)
+        try:
+            for idx, ch in enumerate(
+                iter_time_chunks(
+                    iter_segments(video_id),
+                    target_window_seconds=target_window,
+                    max_window_seconds=max_window,
+                    min_window_seconds=min_window,
+                    overlap_seconds=overlap_s,
+                ),
+                start=1,
+            ):
+                chunk_total = idx
+                self._ensure_same_run(job_id, claimed_started_at)
+
+                start_time = float(ch["start_time"])
+                end_time = float(ch["end_time"])
+                text = str(ch["text"] or "").strip()
+                if not text:
+                    continue
+
+                chunk_id = f"{video_id}:{idx}"
+                known = known_hashes.get(idx)
+                known_hash = (
+                    known[3]
+                    if known is not None
+                    and known[0] == start_time
+                    and known[1] == end_time
+                    and known[2] == len(text)
+                    else None
+                )
+                if known_hash is not None and same_source:
+                    content_hash = known_hash
+                else:
+                    content_hash = sha256_text(text)
+                unchanged = known_hash == content_hash
+
+                ids.append(chunk_id)
+                documents.append(text)
+                chunk_indexes.append(int(idx))
+                start_times.append(start_time)
+                end_times.append(end_time)
+                content_hashes.append(content_hash)
+
+                if not unchanged:
+                    pending_rows.append(
+                        (
+                            chunk_id,
+                            video_id,
+                            int(idx),
+                            start_time,
+                            end_time,
+                            text,
+                            content_hash,
+                        )
+                    )
+                    if len(pending_rows) >= _CHUNK_INSERT_BATCH_SIZE:
+                        insert_chunks(pending_rows)
+                        pending_rows = []
+
+                if not (unchanged and vectors_reusable):
+                    embed_positions.append(len(ids) - 1)
+                    if (
+                        len(embed_positions) - embed_submitted
+                        >= embed_batch_size
+                    ):
+                        _submit_embed_batch()
+                        _drain_embeds(2 * embed_concurrency)
+
+                now = time.monotonic()
+                if now - last_progress_ts > _PROGRESS_INTERVAL_SECONDS:
+                    last_progress_ts = now
+                    p = min(0.25, end_time / duration * 0.25)
+                    update_job(
+                        job_id,
+                        progress=p,
+                        message=f"chunking {idx}",
+                    )
+                    upsert_video_index(
+                        video_id=video_id,
+                        status="running",
+                        progress=p,
+                        message=f"chunking {idx}",
+                        embed_model=embed_model,
+                        embed_dim=embed_dim,
+                        collection_name=collection_name,
+                        chunk_params_json=chunk_params_json,
+                        transcript_hash=transcript_hash,
+                        chunk_count=len(ids),
+                        indexed_count=0,
+                    )
+
+            insert_chunks(pending_rows)
+            _submit_embed_batch()
+
+            if not chunk_total:
+                upsert_video_index(
+                    video_id=video_id,
+                    status="failed",
+                    progress=0.0,
+                    message="failed",
+                    embed_model=embed_model,
+                    embed_dim=embed_dim,
+                    collection_name=collection_name,
+                    chunk_params_json=chunk_params_json,
+                    transcript_hash=transcript_hash,
+                    error_code="E_CHUNKING_FAILED",
+                    error_message="no chunks generated",
+                )
                 update_job(
                     job_id,
-                    progress=p,
-                    message=f"chunking {idx}/{len(chunks)}",
+                    status="failed",
+                    progress=0.0,
+                    message="failed",
+                    error_code="E_CHUNKING_FAILED",
+                    error_message="no chunks generated",
                 )
+                return
+
+            if not ids:
                 upsert_video_index(
                     video_id=video_id,
-                    status="running",
-                    progress=p,
-                    message=f"chunking {idx}/{len(chunks)}",
+                    status="failed",
+                    progress=0.0,
+                    message="failed",
                     embed_model=embed_model,
                     embed_dim=embed_dim,
+                    collection_name=collection_name,
                     chunk_params_json=chunk_params_json,
                     transcript_hash=transcript_hash,
-                    chunk_count=len(ids),
-                    indexed_count=0,
+                    error_code="E_CHUNKING_FAILED",
+                    error_message="all chunks empty",
                 )
+                update_job(
+                    job_id,
+                    status="failed",
+                    progress=0.0,
+                    message="failed",
+                    error_code="E_CHUNKING_FAILED",
+                    error_message="all chunks empty",
+                )
+                return
 
-        if not ids:
+            self._ensure_same_run(job_id, claimed_started_at, force=True)
+            update_job(job_id, progress=0.3, message=f"embedding 0/{len(ids)}")
             upsert_video_index(
                 video_id=video_id,
-                status="failed",
-                progress=0.0,
-                message="failed",
+                status="running",
+                progress=0.3,
+                message=f"embedding 0/{len(ids)}",
                 embed_model=embed_model,
                 embed_dim=embed_dim,
-                chunk_params_json=json.dumps(chunk_params, ensure_ascii=False),
+                collection_name=collection_name,
+                chunk_params_json=chunk_params_json,
                 transcript_hash=transcript_hash,
-                error_code="E_CHUNKING_FAILED",
-                error_message="all chunks empty",
-            )
-            update_job(
-                job_id,
-                status="failed",
-                progress=0.0,
-                message="failed",
-                error_code="E_CHUNKING_FAILED",
-                error_message="all chunks empty",
+                chunk_count=len(ids),
+                indexed_count=0,
             )
-            return
 
-        self._ensure_same_run(job_id, claimed_started_at)
-        update_job(job_id, progress=0.3, message=f"embedding 0/{len(ids)}")
-        upsert_video_index(
-            video_id=video_id,
-            status="running",
-            progress=0.3,
-            message=f"embedding 0/{len(ids)}",
-            embed_model=embed_model,
-            embed_dim=embed_dim,
-            chunk_params_json=chunk_params_json,
-            transcript_hash=transcript_hash,
-            chunk_count=len(ids),
-            indexed_count=0,
-        )
+            report_upserts = True
+            _drain_embeds(0)
+            if embed_error is None:
+                _flush_upserts(True)
 
-        try:
-            embeddings = embed_texts(
-                texts_for_embed,
-                model=embed_model,
-                dim=embed_dim,
-            )
-        except Exception as e:
-            if str(embed_model or "").lower().startswith("fastembed"):
-                embed_model = "hash"
-                collection_name = chunks_collection_name(
-                    embed_model,
-                    embed_dim,
-                )
-                for md in metadatas:
-                    try:
-                        md["embed_model"] = embed_model
-                    except Exception:
-                        pass
+        finally:
+            for _, fut in embed_futures:
+                fut.cancel()
+            embed_pool.shutdown(wait=False, cancel_futures=True)
 
-                if from_scratch:
-                    try:
-                        delete_video_vectors(
-                            collection_name=collection_name,
-                            video_id=video_id,
-                        )
-                    except VectorStoreUnavailable:
-                        pass
+        if embed_error is not None and upsert_error is None:
+            if not str(embed_model or "").lower().startswith("fastembed"):
+                raise embed_error
 
-                update_job(
-                    job_id,
-                    progress=0.3,
-                    message=f"embedding_fallback_hash 0/{len(ids)}",
-                )
-                upsert_video_index(
+            try:
+                delete_video_vectors(
+                    collection_name=collection_name,
                     video_id=video_id,
-                    status="running",
-                    progress=0.3,
-                    message=f"embedding_fallback_hash 0/{len(ids)}",
-                    embed_model=embed_model,
-                    embed_dim=embed_dim,
-                    chunk_params_json=chunk_params_json,
-                    transcript_hash=transcript_hash,
-                    chunk_count=len(ids),
-                    indexed_count=0,
                 )
+            except VectorStoreUnavailable:
+                pass
 
-                embeddings = embed_texts(
-                    texts_for_embed,
-                    model=embed_model,
-                    dim=embed_dim,
-                )
-            else:
-                raise e
+            embed_model = "hash"
+            collection_name = chunks_collection_name(embed_model, embed_dim)
+            embed_positions = list(range(len(ids)))
+            upsert_positions.clear()
+            upsert_vectors_buf.clear()
+            upserted = 0
 
-        try:
-            upsert_vectors(
+            if from_scratch:
+                try:
+                    delete_video_vectors(
+                        collection_name=collection_name,
+                        video_id=video_id,
+                    )
+                except VectorStoreUnavailable:
+                    pass
+
+            update_job(
+                job_id,
+                progress=0.3,
+                message=f"embedding_fallback_hash 0/{len(ids)}",
+            )
+            upsert_video_index(
+                video_id=video_id,
+                status="running",
+                progress=0.3,
+                message=f"embedding_fallback_hash 0/{len(ids)}",
+                embed_model=embed_model,
+                embed_dim=embed_dim,
                 collection_name=collection_name,
-                ids=ids,
-                documents=documents,
-                embeddings=embeddings,
-                metadatas=metadatas,
+                chunk_params_json=chunk_params_json,
+                transcript_hash=transcript_hash,
+                chunk_count=len(ids),
+                indexed_count=0,
             )
-        except VectorStoreUnavailable as e:
+
+            for off in range(0, len(ids), upsert_batch_size):
+                self._ensure_same_run(job_id, claimed_started_at)
+                window = embed_positions[off:off + upsert_batch_size]
+                upsert_positions.extend(window)
+                upsert_vectors_buf.extend(
+                    embed_texts(
+                        [documents[i] for i in window],
+                        model=embed_model,
+                        dim=embed_dim,
+                    )
+                )
+                _flush_upserts(True)
+                if upsert_error is not None:
+                    break
+
+        if upsert_error is not None:
             upsert_video_index(
                 video_id=video_id,
                 status="failed",
@@ -900,10 +1434,11 @@ class JobWorker:
                 message="failed",
                 embed_model=embed_model,
                 embed_dim=embed_dim,
+                collection_name=collection_name,
                 chunk_params_json=chunk_params_json,
                 transcript_hash=transcript_hash,
                 error_code="E_VECTOR_STORE_UNAVAILABLE",
-                error_message=str(e)[:2000],
+                error_message=str(upsert_error)[:2000],
             )
             update_job(
                 job_id,
@@ -911,11 +1446,11 @@ class JobWorker:
                 progress=0.0,
                 message="failed",
                 error_code="E_VECTOR_STORE_UNAVAILABLE",
-                error_message=str(e)[:2000],
+                error_message=str(upsert_error)[:2000],
             )
             return
 
-        self._ensure_same_run(job_id, claimed_started_at)
+        self._ensure_same_run(job_id, claimed_started_at, force=True)
         update_job(job_id, progress=0.99, message="finalizing")
         upsert_video_index(
             video_id=video_id,
@@ -924,12 +1459,114 @@ class JobWorker:
             message="completed",
             embed_model=embed_model,
             embed_dim=embed_dim,
+            collection_name=collection_name,
             chunk_params_json=chunk_params_json,
             transcript_hash=transcript_hash,
             chunk_count=len(ids),
             indexed_count=len(ids),
         )
 
+    def _summarize_batched(
+        self,
+        tasks: List[Tuple[float, float, str]],
+        results: List[Optional[Dict[str, Any]]],
+        *,
+        provider: Any,
+        prefs: LLMPreferences,
+        output_language: str,
+        max_chars: int,
+        parse: Callable[[str], Any],
+    ) -> None:
+        payload = orjson.dumps(
+            [
+                {
+                    "i": i,
+                    "start": round(start_time, 2),
+                    "end": round(end_time, 2),
+                    "text": text,
+                }
+                for i, (start_time, end_time, text) in enumerate(tasks)
+            ]
+        ).decode("utf-8")
+        if len(payload) > max_chars:
+            return
+
+        if output_language == "zh":
+            batch_system = (
+                "\u4f60\u662f\u4e00\u4e2a\u89c6\u9891\u5185\u5bb9"
+                "\u6574\u7406\u52a9\u624b\u3002"
+                "\u4f60\u9700\u8981\u5bf9\u89c6\u9891\u8f6c\u5199"
+                "\u7247\u6bb5\u8fdb\u884c\u7b80\u8981\u603b\u7ed3"
+                "\uff0c\u8981\u6c42\u7b80\u6d01\uff0c\u4fdd\u7559"
+                "\u5173\u952e\u4e8b\u5b9e\u3002"
+                "\u8bf7\u7528\u4e2d\u6587\u8f93\u51fa\u3002"
+                "\u53ea\u8f93\u51fa JSON\u3002"
+            )
+            batch_user = (
+                "\u8bf7\u5bf9\u4e0b\u9762\u6bcf\u4e2a\u8f6c\u5199"
+                "\u7247\u6bb5\u7528\u8981\u70b9"
+                "\uff08bullet points\uff09\u5199\u4e00\u6bb5"
+                "\u7b80\u77ed\u603b\u7ed3\u3002"
+                "\u8f93\u51fa\u4e00\u4e2a JSON \u6570\u7ec4\uff0c"
+                "\u6bcf\u4e2a\u8f93\u5165\u7247\u6bb5\u5bf9\u5e94"
+                "\u4e00\u4e2a\u5bf9\u8c61\uff0c\u5b57\u6bb5\u4e3a"
+                " i \u548c summary\uff0c\u987a\u5e8f\u4e0e\u8f93\u5165"
+                "\u4e00\u81f4\u3002\u53ea\u8f93\u51fa JSON\u3002\n\n"
+                f"Input JSON:\n{payload}"
+            )
+        else:
+            batch_system = (
+                "You summarize transcript segments. "
+                "Be concise and keep key facts. Write in English. "
+                "Output JSON only."
+            )
+            batch_user = (
+                "Write a short bullet-point summary for each transcript "
+                "segment below. Return a JSON array with one object per "
+                "input segment, in input order, with fields i and summary. "
+                "Output JSON only.\n\n"
+                f"Input JSON:\n{payload}"
+            )
+
+        messages: List[ChatMessage] = [
+            {
+                "role": "system",
+                "content": batch_system,
+            },
+            {
+                "role": "user",
+                "content": batch_user,
+            },
+        ]
+        with limit_llm():
+            raw = provider.generate(
+                messages=messages,
+                prefs=prefs,
+                confirm_send=False,
+            )
+
+        items = parse(raw)
+        if not isinstance(items, list):
+            return
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                i = int(item.get("i", -1))
+            except (TypeError, ValueError):
+                continue
+            summary = item.get("summary")
+            if isinstance(summary, list):
+                summary = "\n".join(f"- {str(x).strip()}" for x in summary)
+            if not isinstance(summary, str) or not summary.strip():
+                continue
+            if 0 <= i < len(tasks) and results[i] is None:
+                results[i] = {
+                    "start_time": tasks[i][0],
+                    "end_time": tasks[i][1],
+                    "summary": summary.strip(),
+                }
+
     def _run_summarize(
         self,
         job: Dict[str, Any],
@@ -940,14 +1577,9 @@ class JobWorker:
             if not s:
                 return ""
 
-            if "```" in s:
-                parts = s.split("```")
-                if len(parts) >= 3:
-                    s2 = parts[1]
-                    s2 = s2.lstrip()
-                    if s2.lower().startswith("json"):
-                        s2 = s2[4:]
-                    return s2.strip()
+            m = _JSON_FENCE_RE.search(s)
+            if m:
+                return m.group(1).strip()
 
             lbr = s.find("[")
             rbr = s.rfind("]")
@@ -962,28 +1594,35 @@ class JobWorker:
             return s
 
         def _parse_jsonish(s: str) -> Any:
+            s = str(s or "")
+            if "```" not in s:
+                idx = s.find("[")
+                if idx == -1:
+                    idx = s.find("{")
+                if idx != -1:
+                    try:
+                        return _JSON_DECODER.raw_decode(s, idx)[0]
+                    except ValueError:
+                        pass
+
             s = _extract_json_text(s)
             if not s:
                 return []
             try:
-                obj = json.loads(s)
+                obj = orjson.loads(s)
             except Exception:
                 return {"raw": str(s)}
 
             if isinstance(obj, str):
                 s2 = obj.strip()
                 try:
-                    return json.loads(s2)
+                    return orjson.loads(s2)
                 except Exception:
                     return {"raw": str(obj)}
             return obj
 
         def _looks_like_zh(s: str) -> bool:
-            s2 = str(s or "")
-            for ch in s2[:400]:
-                if "\u4e00" <= ch <= "\u9fff":
-                    return True
-            return False
+            return _ZH_RE.search(str(s or "")[:400]) is not None
 
         def _normalize_output_language(v: str, hint_text: str = "") -> str:
             lang = str(v or "").strip().lower() or "zh"
@@ -1002,12 +1641,27 @@ class JobWorker:
 
         params: Dict[str, Any] = {}
         try:
-            params = json.loads(job.get("params_json") or "{}")
+            params = orjson.loads(job.get("params_json") or "{}")
         except Exception:
             params = {}
 
         if not transcript_exists(video_id):
             raise RuntimeError("TRANSCRIPT_NOT_FOUND")
+
+        transcript_hash = get_transcript_hash(video_id)
+        from_scratch = bool(params.get("from_scratch"))
+        params_json = orjson.dumps(params).decode("utf-8")
+        if not from_scratch:
+            prev = get_video_summary(video_id) or {}
+            if (
+                prev.get("status") == "completed"
+                and transcript_hash
+                and prev.get("transcript_hash") == transcript_hash
+                and prev.get("params_json") == params_json
+            ):
+                update_job(job_id, progress=1.0, message="cached")
+                return
+
         segs = load_segments(video_id)
         if not segs:
             raise RuntimeError("TRANSCRIPT_NOT_FOUND")
@@ -1044,24 +1698,46 @@ class JobWorker:
             ),
         )
 
-        transcript_hash = get_transcript_hash(video_id)
-        from_scratch = bool(params.get("from_scratch"))
         if from_scratch:
             delete_video_summary(video_id)
+            delete_cached_llm_responses(transcript_hash)
+
+        use_llm_cache = prefs.temperature <= _LLM_CACHE_MAX_TEMPERATURE
+
+        def _generate_cached(
+            messages: List[ChatMessage],
+            stage_prefs: LLMPreferences,
+        ) -> str:
+            cache_key: Optional[str] = None
+            if use_llm_cache:
+                cache_key = sha256_text(
+                    orjson.dumps(
+                        [
+                            provider_name,
+                            stage_prefs.model,
+                            stage_prefs.temperature,
+                            stage_prefs.max_tokens,
+                            messages,
+                        ]
+                    ).decode("utf-8")
+                )
+                cached = get_cached_llm_response(cache_key)
+                if cached is not None:
+                    return cached
+
+            with limit_llm():
+                out = provider.generate(
+                    messages=messages,
+                    prefs=stage_prefs,
+                    confirm_send=False,
+                )
+            if cache_key is not None and out:
+                put_cached_llm_response(cache_key, transcript_hash, out)
+            return out
 
         chunk_params = {
-            "target_window_seconds": float(
-                params.get("target_window_seconds") or 120.0
-            ),
-            "max_window_seconds": float(
-                params.get("max_window_seconds") or 180.0
-            ),
-            "min_window_seconds": float(
-                params.get("min_window_seconds") or 60.0
-            ),
-            "overlap_seconds": float(
-                params.get("overlap_seconds") or 10.0
-            ),
+            k: float(params.get(k) or v)
+            for k, v in _SUMMARY_CHUNK_DEFAULTS.items()
         }
         chunks = segments_to_time_chunks(segs, **chunk_params)
         if not chunks:
@@ -1072,7 +1748,6 @@ class JobWorker:
             hint_text=str(chunks[0].get("text") or ""),
         )
 
-        params_json = json.dumps(params, ensure_ascii=False)
         upsert_video_summary(
             video_id=video_id,
             status="running",
@@ -1085,103 +1760,132 @@ class JobWorker:
             outline_json=None,
         )
 
-        segment_summaries: list[Dict[str, Any]] = []
-        n = len(chunks)
-        for i, ch in enumerate(chunks):
-            if self._stop:
-                raise RuntimeError("worker stopped")
-
-            self._ensure_same_run(job_id, claimed_started_at)
-
-            start_time = float(ch.get("start_time") or 0.0)
-            end_time = float(ch.get("end_time") or 0.0)
-            text = str(ch.get("text") or "").strip()
-            if not text:
-                continue
-
-            if output_language == "zh":
-                seg_system = (
-                    "\u4f60\u662f\u4e00\u4e2a\u89c6\u9891\u5185\u5bb9"
-                    "\u6574\u7406\u52a9\u624b\u3002"
-                    "\u4f60\u9700\u8981\u5bf9\u89c6\u9891\u8f6c\u5199"
-                    "\u7247\u6bb5\u8fdb\u884c\u7b80\u8981\u603b\u7ed3"
-                    "\uff0c\u8981\u6c42\u7b80\u6d01\uff0c\u4fdd\u7559"
-                    "\u5173\u952e\u4e8b\u5b9e\u3002"
-                    "\u8bf7\u7528\u4e2d\u6587\u8f93\u51fa\u3002"
-                )
-                seg_user = (
-                    "\u65f6\u95f4\u8303\u56f4\uff1a"
-                    + f"{start_time:.2f}-{end_time:.2f} \u79d2\n\n"
-                    "\u8f6c\u5199\uff1a\n"
-                    f"{text[:12000]}\n\n"
-                    "\u4efb\u52a1\uff1a\u7528\u8981\u70b9"
-                    "\uff08bullet points\uff09\u5199\u4e00\u6bb5"
-                    "\u7b80\u77ed\u603b\u7ed3\u3002"
-                )
-            else:
-                seg_system = (
-                    "You summarize transcript segments. "
-                    "Be concise and keep key facts. Write in English."
-                )
-                seg_user = (
-                    "Time range: "
-                    + f"{start_time:.2f}-{end_time:.2f} seconds\n\n"
-                    "Transcript:\n"
-                    f"{text[:12000]}\n\n"
-                    "Task: write a short bullet-point summary."
-                )
+        if output_language == "zh":
+            seg_system = _ZH_SEG_SYSTEM
+            seg_user_tmpl = _ZH_SEG_USER_TMPL
+        else:
+            seg_system = _EN_SEG_SYSTEM
+            seg_user_tmpl = _EN_SEG_USER_TMPL
+        seg_system_msg: ChatMessage = {
+            "role": "system",
+            "content": seg_system,
+        }
 
+        def _summarize_one(start_time: float, end_time: float, text: str) -> str:
             messages: List[ChatMessage] = [
-                {
-                    "role": "system",
-                    "content": seg_system,
-                },
+                seg_system_msg,
                 {
                     "role": "user",
-                    "content": seg_user,
+                    "content": seg_user_tmpl.format(
+                        s=start_time, e=end_time, t=text
+                    ),
                 },
             ]
-            with limit_llm(
-                timeout_seconds=get_llm_concurrency_timeout_seconds()
-            ):
+            if self._stop:
+                raise RuntimeError("worker stopped")
+            with limit_llm():
                 part = provider.generate(
                     messages=messages,
                     prefs=prefs,
                     confirm_send=False,
                 )
-            segment_summaries.append(
-                {
+            return (part or "").strip()
+
+        tasks: List[Tuple[float, float, str]] = []
+        for ch in chunks:
+            text = str(ch.get("text") or "").strip()
+            if text:
+                tasks.append(
+                    (
+                        float(ch.get("start_time") or 0.0),
+                        float(ch.get("end_time") or 0.0),
+                        text[:12000],
+                    )
+                )
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+        if bool(params.get("batch_segments")) and tasks:
+            self._summarize_batched(
+                tasks,
+                results,
+                provider=provider,
+                prefs=replace(
+                    prefs,
+                    max_tokens=max(
+                        prefs.max_tokens,
+                        int(params.get("batch_max_tokens") or 4096),
+                    ),
+                ),
+                output_language=output_language,
+                max_chars=int(
+                    params.get("batch_max_chars") or _SUMMARY_BATCH_MAX_CHARS
+                ),
+                parse=_parse_jsonish,
+            )
+        pending = [i for i, r in enumerate(results) if r is None]
+        done_count = len(tasks) - len(pending)
+        summary_update_every = max(1, len(tasks) // 20)
+        progress_step = 0.7 / max(1, len(tasks))
+        last_progress_ts = time.monotonic()
+        map_pool = ThreadPoolExecutor(
+            max_workers=max(1, min(get_llm_concurrency_limit(), len(pending)))
+        )
+        try:
+            futures = {
+                map_pool.submit(_summarize_one, *tasks[idx]): idx
+                for idx in pending
+            }
+            for fut in as_completed(futures):
+                if self._stop:
+                    raise RuntimeError("worker stopped")
+                self._ensure_same_run(job_id, claimed_started_at)
+
+                idx = futures[fut]
+                start_time, end_time, _ = tasks[idx]
+                results[idx] = {
                     "start_time": start_time,
                     "end_time": end_time,
-                    "summary": (part or "").strip(),
+                    "summary": fut.result(),
                 }
-            )
+                done_count += 1
 
-            progress = 0.05 + 0.7 * (float(i + 1) / float(max(1, n)))
-            update_job(job_id, progress=progress, message="summarizing")
-            update_video_summary(
-                video_id,
-                status="running",
-                progress=progress,
-                message="summarizing",
-                segment_summaries_json=json.dumps(
-                    segment_summaries,
-                    ensure_ascii=False,
-                ),
-                transcript_hash=transcript_hash,
-                params_json=params_json,
-            )
+                now = time.monotonic()
+                if (
+                    done_count % summary_update_every
+                    and now - last_progress_ts <= _SUMMARY_UPDATE_SECONDS
+                ):
+                    continue
+                last_progress_ts = now
+                progress = 0.05 + progress_step * done_count
+                update_job(job_id, progress=progress, message="summarizing")
+                update_video_summary(
+                    video_id,
+                    status="running",
+                    progress=progress,
+                    message="summarizing",
+                )
+        finally:
+            map_pool.shutdown(wait=False, cancel_futures=True)
 
-        self._ensure_same_run(job_id, claimed_started_at)
+        segment_summaries = [r for r in results if r is not None]
+        segment_summaries_json = orjson.dumps(segment_summaries).decode("utf-8")
+
+        self._ensure_same_run(job_id, claimed_started_at, force=True)
         update_job(job_id, progress=0.8, message="reducing")
         update_video_summary(
             video_id,
             status="running",
             progress=0.8,
             message="reducing",
+            segment_summaries_json=segment_summaries_json,
+            transcript_hash=transcript_hash,
+            params_json=params_json,
         )
 
-        reduce_input = json.dumps(segment_summaries, ensure_ascii=False)
+        reduce_input = segment_summaries_json
+        reduce_max_chars = max(
+            1000, int(params.get("reduce_max_chars") or _REDUCE_MAX_CHARS)
+        )
 
         if output_language == "zh":
             reduce_system = (
@@ -1190,44 +1894,35 @@ class JobWorker:
                 "\uff08Markdown\uff09\u3002"
                 "\u8bf7\u7528\u4e2d\u6587\u8f93\u51fa\u3002"
             )
-            reduce_user = (
-                "\u7ed9\u5b9a\u5e26\u65f6\u95f4\u6233\u7684"
-                "\u7247\u6bb5\u603b\u7ed3\uff08JSON\uff09\uff0c"
-                "\u8bf7\u5199\u51fa\u4e00\u4efd Markdown \u683c\u5f0f"
-                "\u7684\u89c6\u9891\u603b\u7ed3\uff0c\u5c3d\u91cf"
-                "\u4fdd\u7559\u5173\u952e\u65f6\u95f4\u70b9\u3002\n\n"
-                f"Input JSON:\n{reduce_input[:18000]}"
-            )
         else:
             reduce_system = "You write a structured video summary."
-            reduce_user = (
-                "Given segment summaries with timestamps (JSON), "
-                "write a Markdown summary with key timestamps.\n\n"
-                f"Input JSON:\n{reduce_input[:18000]}"
-            )
 
-        messages_reduce: List[ChatMessage] = [
-            {
-                "role": "system",
-                "content": reduce_system,
-            },
-            {
-                "role": "user",
-                "content": reduce_user,
-            },
-        ]
-        with limit_llm(timeout_seconds=get_llm_concurrency_timeout_seconds()):
-            summary_md = provider.generate(
-                messages=messages_reduce,
-                prefs=reduce_prefs,
-                confirm_send=False,
-            )
-
-        self._ensure_same_run(
-            job_id,
-            claimed_started_at,
-        )
-        update_job(job_id, progress=0.9, message="outline")
+        def _reduce_messages(input_json: str) -> List[ChatMessage]:
+            if output_language == "zh":
+                reduce_user = (
+                    "\u7ed9\u5b9a\u5e26\u65f6\u95f4\u6233\u7684"
+                    "\u7247\u6bb5\u603b\u7ed3\uff08JSON\uff09\uff0c"
+                    "\u8bf7\u5199\u51fa\u4e00\u4efd Markdown \u683c\u5f0f"
+                    "\u7684\u89c6\u9891\u603b\u7ed3\uff0c\u5c3d\u91cf"
+                    "\u4fdd\u7559\u5173\u952e\u65f6\u95f4\u70b9\u3002\n\n"
+                    f"Input JSON:\n{input_json[:reduce_max_chars]}"
+                )
+            else:
+                reduce_user = (
+                    "Given segment summaries with timestamps (JSON), "
+                    "write a Markdown summary with key timestamps.\n\n"
+                    f"Input JSON:\n{input_json[:reduce_max_chars]}"
+                )
+            return [
+                {
+                    "role": "system",
+                    "content": reduce_system,
+                },
+                {
+                    "role": "user",
+                    "content": reduce_user,
+                },
+            ]
 
         if output_language == "zh":
             outline_system = (
@@ -1245,7 +1940,7 @@ class JobWorker:
                 "\u4f46 title/bullets \u7684\u5185\u5bb9"
                 "\u8bf7\u7528\u4e2d\u6587\u3002"
                 "\u53ea\u8f93\u51fa JSON\u3002\n\n"
-                f"Input JSON:\n{reduce_input[:18000]}"
+                f"Input JSON:\n{reduce_input[:reduce_max_chars]}"
             )
         else:
             outline_system = "You produce JSON only."
@@ -1253,7 +1948,7 @@ class JobWorker:
                 "From the segment summaries JSON, generate an outline "
                 "as a JSON array. Each item: title, start_time, end_time, "
                 "bullets (array of strings). Output JSON only.\n\n"
-                f"Input JSON:\n{reduce_input[:18000]}"
+                f"Input JSON:\n{reduce_input[:reduce_max_chars]}"
             )
 
         messages_outline: List[ChatMessage] = [
@@ -1266,14 +1961,91 @@ class JobWorker:
                 "content": outline_user,
             },
         ]
-        with limit_llm(timeout_seconds=get_llm_concurrency_timeout_seconds()):
-            outline_raw = provider.generate(
-                messages=messages_outline,
-                prefs=outline_prefs,
-                confirm_send=False,
+        llm_limit = get_llm_concurrency_limit()
+        outline_pool: Optional[ThreadPoolExecutor] = None
+        outline_future: Optional[Future] = None
+        if llm_limit >= 2:
+            outline_pool = ThreadPoolExecutor(max_workers=1)
+            outline_future = outline_pool.submit(
+                _generate_cached, messages_outline, outline_prefs
             )
+        try:
+            if len(reduce_input) <= reduce_max_chars:
+                summary_md = _generate_cached(
+                    _reduce_messages(reduce_input), reduce_prefs
+                )
+            else:
+                groups = _pack_reduce_groups(segment_summaries, reduce_max_chars)
+                reduce_slots = llm_limit - (1 if outline_future else 0)
+                reduce_pool = ThreadPoolExecutor(
+                    max_workers=max(1, min(reduce_slots, len(groups)))
+                )
+                try:
+                    reduce_futures = [
+                        reduce_pool.submit(
+                            _generate_cached,
+                            _reduce_messages(orjson.dumps(g).decode("utf-8")),
+                            reduce_prefs,
+                        )
+                        for g in groups
+                    ]
+                    partials: List[str] = []
+                    for fut in reduce_futures:
+                        if self._stop:
+                            raise RuntimeError("worker stopped")
+                        self._ensure_same_run(job_id, claimed_started_at)
+                        partials.append(str(fut.result() or "").strip())
+                finally:
+                    reduce_pool.shutdown(wait=False, cancel_futures=True)
+
+                combine_input = "\n\n---\n\n".join(p for p in partials if p)
+                if output_language == "zh":
+                    combine_user = (
+                        "\u4e0b\u9762\u662f\u6309\u65f6\u95f4\u987a\u5e8f"
+                        "\u6392\u5217\u7684\u5206\u6bb5 Markdown \u603b\u7ed3"
+                        "\uff0c\u8bf7\u5c06\u5b83\u4eec\u5408\u5e76\u4e3a"
+                        "\u4e00\u4efd\u5b8c\u6574\u7684 Markdown \u683c\u5f0f"
+                        "\u89c6\u9891\u603b\u7ed3\uff0c\u5c3d\u91cf"
+                        "\u4fdd\u7559\u5173\u952e\u65f6\u95f4\u70b9\u3002\n\n"
+                        + combine_input[:reduce_max_chars]
+                    )
+                else:
+                    combine_user = (
+                        "Below are partial Markdown summaries of consecutive "
+                        "parts of one video, in chronological order. Merge them "
+                        "into a single Markdown summary with key timestamps.\n\n"
+                        + combine_input[:reduce_max_chars]
+                    )
+                messages_combine: List[ChatMessage] = [
+                    {
+                        "role": "system",
+                        "content": reduce_system,
+                    },
+                    {
+                        "role": "user",
+                        "content": combine_user,
+                    },
+                ]
+                summary_md = _generate_cached(messages_combine, reduce_prefs)
+
+            self._ensure_same_run(
+                job_id,
+                claimed_started_at,
+            )
+            update_job(job_id, progress=0.9, message="outline")
+            if outline_future is not None:
+                outline_raw = outline_future.result()
+            else:
+                outline_raw = _generate_cached(messages_outline, outline_prefs)
+        finally:
+            if outline_pool is not None:
+                outline_pool.shutdown(wait=False, cancel_futures=True)
 
         outline_obj = _parse_jsonish(outline_raw)
+        if isinstance(outline_obj, dict) and "raw" in outline_obj:
+            repaired = _try_repair_json(str(outline_obj.get("raw") or ""))
+            if repaired is not None:
+                outline_obj = repaired
         if isinstance(outline_obj, dict) and "raw" in outline_obj:
             raw_text = str(outline_obj.get("raw") or "")
             if output_language == "zh":
@@ -1304,20 +2076,13 @@ class JobWorker:
                     "content": fix_user,
                 },
             ]
-            with limit_llm(
-                timeout_seconds=get_llm_concurrency_timeout_seconds()
-            ):
-                fixed_raw = provider.generate(
-                    messages=messages_fix,
-                    prefs=outline_prefs,
-                    confirm_send=False,
-                )
+            fixed_raw = _generate_cached(messages_fix, outline_prefs)
             fixed_obj = _parse_jsonish(fixed_raw)
             if not (isinstance(fixed_obj, dict) and "raw" in fixed_obj):
                 outline_obj = fixed_obj
-        outline_json = json.dumps(outline_obj, ensure_ascii=False)
+        outline_json = orjson.dumps(outline_obj).decode("utf-8")
 
-        self._ensure_same_run(job_id, claimed_started_at)
+        self._ensure_same_run(job_id, claimed_started_at, force=True)
         update_job(job_id, progress=0.99, message="finalizing")
         update_video_summary(
             video_id,
@@ -1326,10 +2091,7 @@ class JobWorker:
             message="completed",
             transcript_hash=transcript_hash,
             params_json=params_json,
-            segment_summaries_json=json.dumps(
-                segment_summaries,
-                ensure_ascii=False,
-            ),
+            segment_summaries_json=segment_summaries_json,
             summary_markdown=str(summary_md or ""),
             outline_json=outline_json,
         )
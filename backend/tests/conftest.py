@@ -1,6 +1,8 @@
+import atexit
 import os
+import shutil
 import tempfile
-from typing import Generator
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
 
 import sys
 from pathlib import Path
@@ -9,10 +11,21 @@ import pytest
 from fastapi.testclient import TestClient
 
 os.environ["EDGE_VIDEO_AGENT_DISABLE_WORKER"] = "1"
-os.environ.setdefault(
-    "EDGE_VIDEO_AGENT_DATA_DIR",
-    tempfile.mkdtemp(prefix="edge-video-agent-test-"),
-)
+if "EDGE_VIDEO_AGENT_DATA_DIR" not in os.environ:
+    os.environ["EDGE_VIDEO_AGENT_DATA_DIR"] = tempfile.mkdtemp(
+        prefix="edge-video-agent-test-",
+        dir="/dev/shm" if os.path.isdir("/dev/shm") else None,
+    )
+    atexit.register(
+        shutil.rmtree,
+        os.environ["EDGE_VIDEO_AGENT_DATA_DIR"],
+        ignore_errors=True,
+    )
+if os.environ.get("PYTEST_XDIST_WORKER"):
+    os.environ["EDGE_VIDEO_AGENT_DATA_DIR"] = os.path.join(
+        os.environ["EDGE_VIDEO_AGENT_DATA_DIR"],
+        os.environ["PYTEST_XDIST_WORKER"],
+    )
 
 _backend_dir = Path(__file__).resolve().parents[1]
 if str(_backend_dir) not in sys.path:
@@ -21,7 +34,39 @@ if str(_backend_dir) not in sys.path:
 from app.main import app
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
         yield c
+
+
+@pytest.fixture()
+def patch_query_vectors(monkeypatch) -> Callable[..., List[Tuple[str, bool]]]:
+    from app import main as main_mod
+    from app import vector_store
+
+    empty: Dict[str, Any] = {
+        "ids": [[]],
+        "documents": [[]],
+        "metadatas": [[]],
+        "distances": [[]],
+    }
+
+    def _apply(
+        result: Optional[Dict[str, Any]] = None,
+        *,
+        by_name: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> List[Tuple[str, bool]]:
+        calls: List[Tuple[str, bool]] = []
+        results = dict(by_name or {})
+
+        def fake_query_vectors(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+            name = str(kwargs.get("collection_name") or "")
+            calls.append((name, bool(kwargs.get("create_if_missing", True))))
+            return results.get(name, result if result is not None else empty)
+
+        monkeypatch.setattr(main_mod, "query_vectors", fake_query_vectors)
+        monkeypatch.setattr(vector_store, "_missing_collections", {})
+        return calls
+
+    return _apply
@@ -3,19 +3,43 @@ from __future__ import annotations
 from typing import Any, Dict
 
 import os
-import json
+import hashlib
+import itertools
 import uuid
+from pathlib import Path
+
+import orjson
+import pytest
+
+
+_NOT_FROM_SCRATCH_BODY: Dict[str, Any] = {"from_scratch": False}
+_INTERVAL_BODY: Dict[str, Any] = {"from_scratch": False, "mode": "interval"}
+
+_HIT_C1: Dict[str, Any] = {
+    "ids": [["c1"]],
+    "documents": [["hello world"]],
+    "metadatas": [[{"start_time": 0.0, "end_time": 1.0}]],
+    "distances": [[0.0]],
+}
+
+
+_RUN_PREFIX = uuid.uuid4().hex[:16]
+_COUNTER = itertools.count()
+
+
+def _unique_hex() -> str:
+    return f"{_RUN_PREFIX}{next(_COUNTER):016x}"
 
 
 def _create_video(tmp_path) -> Dict[str, Any]:
-    from app.hashing import sha256_file
     from app.repo import create_or_get_video
 
+    data = _unique_hex().encode("utf-8")
     p = tmp_path / "video.mp4"
-    p.write_bytes(uuid.uuid4().hex.encode("utf-8"))
+    p.write_bytes(data)
     return create_or_get_video(
         file_path=str(p),
-        file_hash=sha256_file(str(p)),
+        file_hash=hashlib.sha256(data).hexdigest(),
         duration=1.0,
     )
 
@@ -47,7 +71,7 @@ def test_index_requires_transcript(client, tmp_path) -> None:
 
     r = client.post(
         f"/videos/{video_id}/index",
-        json={"from_scratch": False},
+        json=_NOT_FROM_SCRATCH_BODY,
     )
     assert r.status_code == 404
     assert r.json().get("detail") == "TRANSCRIPT_NOT_FOUND"
@@ -92,9 +116,8 @@ def test_search_triggers_index_and_dedupes_chat(client, tmp_path) -> None:
 def test_search_and_chat_200_when_index_completed(
     client,
     tmp_path,
-    monkeypatch,
+    patch_query_vectors,
 ) -> None:
-    from app import main as main_mod
     from app.repo import upsert_video_index
     from app.repo import set_default_llm_preferences
     from app.transcript_store import get_transcript_hash
@@ -116,15 +139,7 @@ def test_search_and_chat_200_when_index_completed(
         indexed_count=1,
     )
 
-    def fake_query_vectors(*args: Any, **kwargs: Any) -> Dict[str, Any]:
-        return {
-            "ids": [["c1"]],
-            "documents": [["hello world"]],
-            "metadatas": [[{"start_time": 0.0, "end_time": 1.0}]],
-            "distances": [[0.0]],
-        }
-
-    monkeypatch.setattr(main_mod, "query_vectors", fake_query_vectors)
+    patch_query_vectors(_HIT_C1)
 
     set_default_llm_preferences({"provider": "none"})
 
@@ -180,7 +195,7 @@ def test_search_stale_index_triggers_reindex_from_scratch(
     assert isinstance(job_id, str) and job_id
 
     job = client.get(f"/jobs/{job_id}").json()
-    params = json.loads(job.get("params_json") or "{}")
+    params = orjson.loads(job.get("params_json") or "{}")
     assert params.get("from_scratch") is True
 
 
@@ -190,7 +205,7 @@ def test_summarize_requires_transcript(client, tmp_path) -> None:
 
     r = client.post(
         f"/videos/{video_id}/summarize",
-        json={"from_scratch": False},
+        json=_NOT_FROM_SCRATCH_BODY,
     )
     assert r.status_code == 404
     assert r.json().get("detail") == "TRANSCRIPT_NOT_FOUND"
@@ -203,7 +218,7 @@ def test_summarize_triggers_job_and_dedupes(client, tmp_path) -> None:
 
     r1 = client.post(
         f"/videos/{video_id}/summarize",
-        json={"from_scratch": False},
+        json=_NOT_FROM_SCRATCH_BODY,
     )
     assert r1.status_code == 202
     job_id = r1.json().get("job_id")
@@ -211,7 +226,7 @@ def test_summarize_triggers_job_and_dedupes(client, tmp_path) -> None:
 
     r2 = client.post(
         f"/videos/{video_id}/summarize",
-        json={"from_scratch": False},
+        json=_NOT_FROM_SCRATCH_BODY,
     )
     assert r2.status_code == 202
     assert r2.json().get("detail") == "SUMMARIZING_IN_PROGRESS"
@@ -233,7 +248,7 @@ def test_summarize_200_when_completed_and_fresh(client, tmp_path) -> None:
         progress=1.0,
         message="completed",
         transcript_hash=transcript_hash,
-        params_json=json.dumps({"from_scratch": False}, ensure_ascii=False),
+        params_json=orjson.dumps({"from_scratch": False}).decode("utf-8"),
         summary_markdown="# ok",
         outline_json="[]",
         segment_summaries_json="[]",
@@ -241,7 +256,7 @@ def test_summarize_200_when_completed_and_fresh(client, tmp_path) -> None:
 
     r = client.post(
         f"/videos/{video_id}/summarize",
-        json={"from_scratch": False},
+        json=_NOT_FROM_SCRATCH_BODY,
     )
     assert r.status_code == 200
     assert r.json().get("detail") == "SUMMARY_ALREADY_COMPLETED"
@@ -260,7 +275,7 @@ def test_summarize_stale_triggers_from_scratch(client, tmp_path) -> None:
         progress=1.0,
         message="completed",
         transcript_hash="stale",
-        params_json=json.dumps({"from_scratch": False}, ensure_ascii=False),
+        params_json=orjson.dumps({"from_scratch": False}).decode("utf-8"),
         summary_markdown="# stale",
         outline_json="[]",
         segment_summaries_json="[]",
@@ -268,14 +283,14 @@ def test_summarize_stale_triggers_from_scratch(client, tmp_path) -> None:
 
     r = client.post(
         f"/videos/{video_id}/summarize",
-        json={"from_scratch": False},
+        json=_NOT_FROM_SCRATCH_BODY,
     )
     assert r.status_code == 202
     job_id = r.json().get("job_id")
     assert isinstance(job_id, str) and job_id
 
     job = client.get(f"/jobs/{job_id}").json()
-    params = json.loads(job.get("params_json") or "{}")
+    params = orjson.loads(job.get("params_json") or "{}")
     assert params.get("from_scratch") is True
 
 
@@ -285,7 +300,7 @@ def test_keyframes_triggers_job_and_dedupes(client, tmp_path) -> None:
 
     r1 = client.post(
         f"/videos/{video_id}/keyframes",
-        json={"from_scratch": False, "mode": "interval"},
+        json=_INTERVAL_BODY,
     )
     assert r1.status_code == 202
     job_id = r1.json().get("job_id")
@@ -293,7 +308,7 @@ def test_keyframes_triggers_job_and_dedupes(client, tmp_path) -> None:
 
     r2 = client.post(
         f"/videos/{video_id}/keyframes",
-        json={"from_scratch": False, "mode": "interval"},
+        json=_INTERVAL_BODY,
     )
     assert r2.status_code == 202
     assert r2.json().get("detail") == "KEYFRAMES_IN_PROGRESS"
@@ -311,13 +326,13 @@ def test_keyframes_200_when_completed_params_match(client, tmp_path) -> None:
         status="completed",
         progress=1.0,
         message="completed",
-        params_json=json.dumps({"mode": "interval"}, ensure_ascii=False),
+        params_json=orjson.dumps({"mode": "interval"}).decode("utf-8"),
         frame_count=1,
     )
 
     r = client.post(
         f"/videos/{video_id}/keyframes",
-        json={"from_scratch": False, "mode": "interval"},
+        json=_INTERVAL_BODY,
     )
     assert r.status_code == 200
     assert r.json().get("detail") == "KEYFRAMES_ALREADY_COMPLETED"
@@ -337,7 +352,7 @@ def test_keyframes_completed_but_params_change_triggers_new_job(
         status="completed",
         progress=1.0,
         message="completed",
-        params_json=json.dumps({"mode": "interval"}, ensure_ascii=False),
+        params_json=orjson.dumps({"mode": "interval"}).decode("utf-8"),
         frame_count=1,
     )
 
@@ -363,10 +378,8 @@ def test_keyframes_from_scratch_deletes_jpg_files(client, tmp_path) -> None:
     os.makedirs(d, exist_ok=True)
     jpg_path = os.path.join(d, "dummy.jpg")
     txt_path = os.path.join(d, "dummy.txt")
-    with open(jpg_path, "wb") as f:
-        f.write(b"x")
-    with open(txt_path, "wb") as f:
-        f.write(b"y")
+    Path(jpg_path).write_bytes(b"x")
+    Path(txt_path).write_bytes(b"y")
 
     r = client.post(
         f"/videos/{video_id}/keyframes",
@@ -399,7 +412,7 @@ def test_index_endpoint_is_idempotent_when_fresh(client, tmp_path) -> None:
 
     r = client.post(
         f"/videos/{video_id}/index",
-        json={"from_scratch": False},
+        json=_NOT_FROM_SCRATCH_BODY,
     )
     assert r.status_code == 200
     assert r.json().get("detail") == "INDEX_ALREADY_COMPLETED"
@@ -408,9 +421,8 @@ def test_index_endpoint_is_idempotent_when_fresh(client, tmp_path) -> None:
 def test_search_and_chat_fallback_to_legacy_collection_when_missing(
     client,
     tmp_path,
-    monkeypatch,
+    patch_query_vectors,
 ) -> None:
-    from app import main as main_mod
     from app.repo import upsert_video_index
     from app.repo import set_default_llm_preferences
     from app.transcript_store import get_transcript_hash
@@ -436,38 +448,18 @@ def test_search_and_chat_fallback_to_legacy_collection_when_missing(
         indexed_count=1,
     )
 
-    calls: list[tuple[str, bool]] = []
-
-    def fake_query_vectors(*args: Any, **kwargs: Any) -> Dict[str, Any]:
-        name = str(kwargs.get("collection_name") or "")
-        create_if_missing = bool(kwargs.get("create_if_missing", True))
-        calls.append((name, create_if_missing))
-
-        if name == versioned:
-            return {
+    calls = patch_query_vectors(
+        by_name={
+            versioned: {
                 "ids": [[]],
                 "documents": [[]],
                 "metadatas": [[]],
                 "distances": [[]],
                 "_collection_missing": True,
-            }
-
-        if name == LEGACY_COLLECTION_NAME:
-            return {
-                "ids": [["c1"]],
-                "documents": [["hello world"]],
-                "metadatas": [[{"start_time": 0.0, "end_time": 1.0}]],
-                "distances": [[0.0]],
-            }
-
-        return {
-            "ids": [[]],
-            "documents": [[]],
-            "metadatas": [[]],
-            "distances": [[]],
+            },
+            LEGACY_COLLECTION_NAME: _HIT_C1,
         }
-
-    monkeypatch.setattr(main_mod, "query_vectors", fake_query_vectors)
+    )
 
     set_default_llm_preferences({"provider": "none"})
 
@@ -498,7 +490,6 @@ def test_search_and_chat_fallback_to_legacy_collection_when_missing(
     assert calls == [
         (versioned, False),
         (LEGACY_COLLECTION_NAME, False),
-        (versioned, False),
         (LEGACY_COLLECTION_NAME, False),
     ]
 
@@ -527,9 +518,8 @@ def test_llm_default_preferences_get_put(client) -> None:
 def test_chat_sse_streaming_with_fake_provider(
     client,
     tmp_path,
-    monkeypatch,
+    patch_query_vectors,
 ) -> None:
-    from app import main as main_mod
     from app.repo import set_default_llm_preferences, upsert_video_index
     from app.transcript_store import get_transcript_hash
 
@@ -549,15 +539,7 @@ def test_chat_sse_streaming_with_fake_provider(
         indexed_count=1,
     )
 
-    def fake_query_vectors(*args: Any, **kwargs: Any) -> Dict[str, Any]:
-        return {
-            "ids": [["c1"]],
-            "documents": [["hello world"]],
-            "metadatas": [[{"start_time": 0.0, "end_time": 1.0}]],
-            "distances": [[0.0]],
-        }
-
-    monkeypatch.setattr(main_mod, "query_vectors", fake_query_vectors)
+    patch_query_vectors(_HIT_C1)
     set_default_llm_preferences({"provider": "fake", "model": "unit-test"})
 
     r = client.post(
@@ -575,3 +557,170 @@ def test_chat_sse_streaming_with_fake_provider(
     text = r.text
     assert "event: token" in text
     assert "event: done" in text
+
+
+def test_missing_collection_cache_is_per_query_and_cleared_on_create(
+    monkeypatch,
+) -> None:
+    from app import vector_store
+
+    monkeypatch.setattr(vector_store, "_missing_collections", {})
+    name = vector_store.chunks_collection_name("hash", 384)
+    video_id = _unique_hex()
+
+    vector_store.mark_collection_missing(name, video_id, "hello")
+    assert vector_store.collection_recently_missing(name, video_id, "hello")
+    assert not vector_store.collection_recently_missing(name, video_id, "bye")
+    assert not vector_store.collection_recently_missing(
+        name, _unique_hex(), "hello"
+    )
+
+    monkeypatch.setitem(vector_store._collections, name, object())
+    assert not vector_store.collection_recently_missing(name, video_id, "hello")
+
+
+def test_transcribe_keeps_finished_chunks_when_asr_fails(
+    client, tmp_path, monkeypatch
+) -> None:
+    from types import SimpleNamespace
+
+    from app import worker
+    from app.transcript_store import load_segments
+
+    v = _create_video(tmp_path)
+    video_id = v["id"]
+
+    def fake_iter_audio_segments(media_path, out_dir, **kwargs):
+        for i in range(3):
+            yield os.path.join(out_dir, f"{i}.wav"), i * 10.0, i * 10.0 + 10.0
+
+    class _FailingASR:
+        calls = 0
+
+        def transcribe_wav(self, wav_path):
+            self.calls += 1
+            if self.calls > 1:
+                raise RuntimeError("ASR_FAILED")
+            seg = SimpleNamespace(start=0.0, end=5.0, text="first chunk")
+            return [seg], SimpleNamespace(language="en")
+
+    monkeypatch.setattr(worker, "iter_audio_segments", fake_iter_audio_segments)
+    w = worker.JobWorker(asr=_FailingASR())  # type: ignore[arg-type]
+    w._ensure_same_run = lambda *a, **k: None  # type: ignore[method-assign]
+
+    job = {"id": _unique_hex(), "video_id": video_id, "params_json": "{}"}
+    with pytest.raises(RuntimeError, match="ASR_FAILED"):
+        w._run_transcribe(job, "")
+
+    segs = load_segments(video_id)
+    assert [s.get("text") for s in segs] == ["first chunk"]
+
+
+def test_index_hash_fallback_drops_partial_fastembed_vectors(
+    client, tmp_path, monkeypatch
+) -> None:
+    from app import worker
+    from app.embeddings import embed_texts
+    from app.transcript_store import append_segments
+    from app.vector_store import chunks_collection_name
+
+    v = _create_video(tmp_path)
+    video_id = v["id"]
+    append_segments(
+        video_id,
+        [
+            {"start": i * 30.0, "end": i * 30.0 + 30.0, "text": f"part {i}"}
+            for i in range(10)
+        ],
+    )
+
+    fastembed = chunks_collection_name("fastembed-test", 8)
+    hashed = chunks_collection_name("hash", 8)
+    events = []
+
+    def fake_embed_texts(texts, *, model, dim):
+        if model != "hash" and events:
+            raise RuntimeError("EMBED_FAILED")
+        return embed_texts(texts, model="hash", dim=dim)
+
+    def fake_upsert_vectors(*, collection_name, ids, **kwargs):
+        events.append(("upsert", collection_name, len(ids)))
+
+    def fake_delete_video_vectors(*, collection_name, video_id):
+        events.append(("delete", collection_name, 0))
+
+    monkeypatch.setattr(worker, "embed_texts", fake_embed_texts)
+    monkeypatch.setattr(worker, "upsert_vectors", fake_upsert_vectors)
+    monkeypatch.setattr(worker, "delete_video_vectors", fake_delete_video_vectors)
+
+    w = worker.JobWorker()
+    w._ensure_same_run = lambda *a, **k: None  # type: ignore[method-assign]
+    params = {
+        "embed_model": "fastembed-test",
+        "embed_dim": 8,
+        "embedding_batch_size": 1,
+        "embedding_concurrency": 1,
+        "upsert_batch_size": 1,
+    }
+    job = {
+        "id": _unique_hex(),
+        "video_id": video_id,
+        "params_json": orjson.dumps(params).decode("utf-8"),
+    }
+    w._run_index(job, "")
+
+    assert events[0][:2] == ("upsert", fastembed)
+    first_hash = events.index(("upsert", hashed, 1))
+    assert ("delete", fastembed, 0) in events[:first_hash]
+
+
+_FAKE_SEGMENT_FFMPEG = """\
+import os
+import sys
+import time
+
+args = sys.argv[1:]
+list_path = args[args.index("-segment_list") + 1]
+out_dir = os.path.dirname(args[-1])
+with open(list_path, "a") as f:
+    for i in range(10):
+        name = "chunk_%05d.wav" % i
+        with open(os.path.join(out_dir, name), "wb") as w:
+            w.write(b"RIFF")
+        f.write("%s,%d.0,%d.0\\n" % (name, i, i + 1))
+        f.flush()
+        time.sleep(0.02)
+"""
+
+
+@pytest.mark.skipif(os.name == "nt", reason="throttling needs SIGSTOP")
+def test_iter_audio_segments_pauses_ffmpeg_while_wavs_pile_up(
+    tmp_path, monkeypatch
+) -> None:
+    import sys
+    import time
+
+    from app import ffmpeg_util
+
+    script = tmp_path / "ffmpeg"
+    script.write_text(f"#!{sys.executable}\n{_FAKE_SEGMENT_FFMPEG}")
+    script.chmod(0o755)
+    monkeypatch.setattr(ffmpeg_util, "resolve_ffmpeg_bin", lambda: str(script))
+
+    out_dir = tmp_path / "out"
+    starts = []
+    peak = 0
+    for wav_path, start, _ in ffmpeg_util.iter_audio_segments(
+        "media.mp4",
+        str(out_dir),
+        segment_seconds=1.0,
+        poll_seconds=0.005,
+        max_pending=2,
+    ):
+        time.sleep(0.1)
+        peak = max(peak, sum(1 for p in out_dir.iterdir() if p.suffix == ".wav"))
+        os.remove(wav_path)
+        starts.append(start)
+
+    assert starts == [float(i) for i in range(10)]
+    assert peak <= 4
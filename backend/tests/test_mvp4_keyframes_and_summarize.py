@@ -1,20 +1,36 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 
-import json
+import hashlib
+import itertools
+import threading
+import time
 import uuid
 
+import orjson
+
+
+_NOT_FROM_SCRATCH_BODY: Dict[str, Any] = {"from_scratch": False}
+
+
+_RUN_PREFIX = uuid.uuid4().hex[:16]
+_COUNTER = itertools.count()
+
+
+def _unique_hex() -> str:
+    return f"{_RUN_PREFIX}{next(_COUNTER):016x}"
+
 
 def _create_video(tmp_path) -> Dict[str, Any]:
-    from app.hashing import sha256_file
     from app.repo import create_or_get_video
 
+    data = _unique_hex().encode("utf-8")
     p = tmp_path / "video.mp4"
-    p.write_bytes(uuid.uuid4().hex.encode("utf-8"))
+    p.write_bytes(data)
     return create_or_get_video(
         file_path=str(p),
-        file_hash=sha256_file(str(p)),
+        file_hash=hashlib.sha256(data).hexdigest(),
         duration=10.0,
     )
 
@@ -34,11 +50,82 @@ def _write_transcript(video_id: str) -> None:
     )
 
 
+class _SlowProvider:
+    requires_confirm_send = False
+
+    def generate(self, *, messages, prefs, confirm_send) -> str:
+        time.sleep(0.2)
+        if "JSON" in str(messages[0].get("content") or ""):
+            return "[]"
+        return "- ok"
+
+
+def _run_slow_summarize(
+    monkeypatch, tmp_path, *, llm_limit: int, jobs: int
+) -> List[Dict[str, Any]]:
+    from app import runtime, worker
+    from app.repo import get_video_summary
+    from app.transcript_store import append_segments
+
+    monkeypatch.setattr(worker, "get_provider", lambda name: _SlowProvider())
+    monkeypatch.setattr(
+        worker,
+        "get_default_llm_preferences",
+        lambda: {"provider": "slow", "output_language": "en"},
+    )
+    monkeypatch.setitem(
+        runtime._timeout_cache, "LLM_CONCURRENCY_TIMEOUT_SECONDS", 0.05
+    )
+
+    video_ids: List[str] = []
+    for n in range(jobs):
+        d = tmp_path / str(n)
+        d.mkdir()
+        video_id = _create_video(d)["id"]
+        append_segments(
+            video_id,
+            [
+                {
+                    "start": i * 30.0,
+                    "end": i * 30.0 + 30.0,
+                    "text": f"{video_id} part {i}",
+                }
+                for i in range(10)
+            ],
+        )
+        video_ids.append(video_id)
+
+    errors: List[Exception] = []
+
+    def _run(video_id: str) -> None:
+        w = worker.JobWorker()
+        w._ensure_same_run = lambda *a, **k: None  # type: ignore[method-assign]
+        job = {"id": _unique_hex(), "video_id": video_id, "params_json": "{}"}
+        try:
+            w._run_summarize(job, "")
+        except Exception as e:
+            errors.append(e)
+
+    prev_limit = runtime.get_llm_concurrency_limit()
+    runtime._llm_limiter.set_max_value(llm_limit)
+    try:
+        threads = [threading.Thread(target=_run, args=(v,)) for v in video_ids]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        runtime._llm_limiter.set_max_value(prev_limit)
+
+    assert errors == []
+    return [get_video_summary(v) or {} for v in video_ids]
+
+
 def test_summarize_video_not_found(client) -> None:
     video_id = str(uuid.uuid4())
     r = client.post(
         f"/videos/{video_id}/summarize",
-        json={"from_scratch": False},
+        json=_NOT_FROM_SCRATCH_BODY,
     )
     assert r.status_code == 404
     assert r.json().get("detail") == "VIDEO_NOT_FOUND"
@@ -50,7 +137,7 @@ def test_summarize_requires_transcript(client, tmp_path) -> None:
 
     r = client.post(
         f"/videos/{video_id}/summarize",
-        json={"from_scratch": False},
+        json=_NOT_FROM_SCRATCH_BODY,
     )
     assert r.status_code == 404
     assert r.json().get("detail") == "TRANSCRIPT_NOT_FOUND"
@@ -142,7 +229,7 @@ def test_aligned_keyframes_scene_nearest_fallback_selects_frames(
     client,
     tmp_path,
 ) -> None:
-    from app.repo import insert_video_keyframe, upsert_video_summary
+    from app.repo import insert_video_keyframes, upsert_video_summary
 
     v = _create_video(tmp_path)
     video_id = v["id"]
@@ -152,39 +239,34 @@ def test_aligned_keyframes_scene_nearest_fallback_selects_frames(
         status="completed",
         progress=1.0,
         message="completed",
-        outline_json=json.dumps(
+        outline_json=orjson.dumps(
             [
                 {
                     "title": "sec1",
                     "start_time": 0.0,
                     "end_time": 10.0,
                 }
-            ],
-            ensure_ascii=False,
-        ),
+            ]
+        ).decode("utf-8"),
     )
 
-    kid1 = str(uuid.uuid4())
-    kid2 = str(uuid.uuid4())
-    insert_video_keyframe(
-        id=kid1,
-        video_id=video_id,
-        timestamp_ms=1000,
-        image_relpath=f"data/keyframes/{video_id}/{kid1}.jpg",
-        method="interval",
-        width=320,
-        height=240,
-        score=None,
-    )
-    insert_video_keyframe(
-        id=kid2,
-        video_id=video_id,
-        timestamp_ms=6000,
-        image_relpath=f"data/keyframes/{video_id}/{kid2}.jpg",
-        method="interval",
-        width=320,
-        height=240,
-        score=None,
+    kid1 = _unique_hex()
+    kid2 = _unique_hex()
+    insert_video_keyframes(
+        [
+            (
+                kid,
+                video_id,
+                timestamp_ms,
+                f"data/keyframes/{video_id}/{kid}.jpg",
+                "interval",
+                320,
+                240,
+                None,
+                None,
+            )
+            for kid, timestamp_ms in ((kid1, 1000), (kid2, 6000))
+        ]
     )
 
     r = client.get(
@@ -215,7 +297,7 @@ def test_keyframes_idempotent_interval_params(client, tmp_path) -> None:
         status="completed",
         progress=1.0,
         message="completed",
-        outline_json=json.dumps([], ensure_ascii=False),
+        outline_json=orjson.dumps([]).decode("utf-8"),
     )
 
     params = {
@@ -229,7 +311,7 @@ def test_keyframes_idempotent_interval_params(client, tmp_path) -> None:
         status="completed",
         progress=1.0,
         message="completed",
-        params_json=json.dumps(params, ensure_ascii=False),
+        params_json=orjson.dumps(params).decode("utf-8"),
         frame_count=0,
     )
 
@@ -252,7 +334,7 @@ def test_keyframes_idempotent_scene_params(client, tmp_path) -> None:
         status="completed",
         progress=1.0,
         message="completed",
-        outline_json=json.dumps([], ensure_ascii=False),
+        outline_json=orjson.dumps([]).decode("utf-8"),
     )
 
     params = {
@@ -267,7 +349,7 @@ def test_keyframes_idempotent_scene_params(client, tmp_path) -> None:
         status="completed",
         progress=1.0,
         message="completed",
-        params_json=json.dumps(params, ensure_ascii=False),
+        params_json=orjson.dumps(params).decode("utf-8"),
         frame_count=0,
     )
 
@@ -277,3 +359,25 @@ def test_keyframes_idempotent_scene_params(client, tmp_path) -> None:
     )
     assert r.status_code == 200
     assert r.json().get("detail") == "KEYFRAMES_ALREADY_COMPLETED"
+
+
+def test_summarize_slow_llm_at_limit_1(client, monkeypatch, tmp_path) -> None:
+    summaries = _run_slow_summarize(monkeypatch, tmp_path, llm_limit=1, jobs=1)
+    assert [s.get("status") for s in summaries] == ["completed"]
+
+
+def test_summarize_concurrent_jobs_share_llm_slots(
+    client, monkeypatch, tmp_path
+) -> None:
+    summaries = _run_slow_summarize(monkeypatch, tmp_path, llm_limit=2, jobs=2)
+    assert [s.get("status") for s in summaries] == ["completed", "completed"]
+
+
+def test_outline_repair_keeps_apostrophes_in_double_quoted_strings() -> None:
+    from app.worker import _try_repair_json
+
+    raw = """[{'title': 'Intro', "bullets": ["it's a 'test'", 'don\\'t']},]"""
+    assert _try_repair_json(raw) == [
+        {"title": "Intro", "bullets": ["it's a 'test'", "don't"]}
+    ]
+    assert _try_repair_json("""["it's a 'test'" oops]""") is None